@@ -130,13 +130,10 @@ impl App {
     }
 
     pub fn set_tab_from_str(&mut self, s: &str) {
-        self.tab = match s.to_lowercase().as_str() {
-            "leaderboard" => Tab::Leaderboard,
-            "evaluation" => Tab::Evaluation,
-            "submission" => Tab::Submission,
-            "network" => Tab::Network,
-            _ => Tab::Leaderboard,
-        };
+        self.tab = Tab::ALL
+            .into_iter()
+            .find(|tab| tab.label().eq_ignore_ascii_case(s))
+            .unwrap_or(Tab::Leaderboard);
         self.scroll_offset = 0;
     }
 
@@ -190,14 +187,20 @@ impl App {
 
         if let Some(cid) = &self.challenge_id {
             let cid = cid.clone();
-            match rpc.fetch_leaderboard(&cid).await {
+            let (leaderboard, stats, decay) = tokio::join!(
+                rpc.fetch_leaderboard(&cid),
+                rpc.fetch_stats(&cid),
+                rpc.fetch_decay_status(&cid),
+            );
+
+            match leaderboard {
                 Ok(rows) => self.leaderboard = rows,
                 Err(e) => {
                     self.error_message = Some(format!("Leaderboard: {e}"));
                 }
             }
 
-            match rpc.fetch_stats(&cid).await {
+            match stats {
                 Ok(stats) => {
                     let body = stats.get("body").unwrap_or(&stats);
                     self.network_status.total_submissions = body
@@ -214,7 +217,7 @@ impl App {
                 }
             }
 
-            match rpc.fetch_decay_status(&cid).await {
+            match decay {
                 Ok(decay) => {
                     if let Some(body) = decay.get("body") {
                         if !body.is_null() {
@@ -253,31 +256,48 @@ impl App {
 
         if let Some(hotkey) = &self.hotkey {
             let hotkey = hotkey.clone();
-            match rpc.fetch_evaluation_progress(&hotkey).await {
+            let cid = self.challenge_id.clone();
+            let (progress, journey, history) = tokio::join!(
+                rpc.fetch_evaluation_progress(&hotkey),
+                async {
+                    match &cid {
+                        Some(cid) => Some(rpc.fetch_agent_journey(cid, &hotkey).await),
+                        None => None,
+                    }
+                },
+                async {
+                    match &cid {
+                        Some(cid) => Some(rpc.fetch_submission_history(cid, &hotkey).await),
+                        None => None,
+                    }
+                },
+            );
+
+            match progress {
                 Ok(tasks) => self.evaluation_progress = tasks,
                 Err(e) => {
                     tracing::debug!("Evaluation progress: {e}");
                 }
             }
 
-            if let Some(cid) = &self.challenge_id {
-                match rpc.fetch_agent_journey(cid, &hotkey).await {
-                    Ok(_journey) => {
-                        tracing::debug!("Agent journey fetched");
-                    }
-                    Err(e) => {
-                        tracing::debug!("Agent journey: {e}");
-                    }
+            match journey {
+                Some(Ok(_journey)) => {
+                    tracing::debug!("Agent journey fetched");
+                }
+                Some(Err(e)) => {
+                    tracing::debug!("Agent journey: {e}");
                 }
+                None => {}
+            }
 
-                match rpc.fetch_submission_history(cid, &hotkey).await {
-                    Ok(history) => {
-                        self.submission_history = Some(history);
-                    }
-                    Err(e) => {
-                        tracing::debug!("Submission history: {e}");
-                    }
+            match history {
+                Some(Ok(history)) => {
+                    self.submission_history = Some(history);
+                }
+                Some(Err(e)) => {
+                    tracing::debug!("Submission history: {e}");
                 }
+                None => {}
             }
         }
 
@@ -285,9 +305,14 @@ impl App {
     }
 
     async fn refresh_network(&mut self, rpc: &RpcClient) -> anyhow::Result<()> {
-        let _ = rpc.fetch_system_health().await?;
+        let (health, epoch_info, validator_count) = tokio::join!(
+            rpc.fetch_system_health(),
+            rpc.fetch_epoch_info(),
+            rpc.fetch_validator_count(),
+        );
+        health?;
 
-        let epoch_info = rpc.fetch_epoch_info().await?;
+        let epoch_info = epoch_info?;
         self.network_status.epoch = epoch_info.epoch;
         self.network_status.phase = epoch_info.phase;
         self.network_status.block_height = epoch_info.block_height;
@@ -295,7 +320,7 @@ impl App {
         self.network_status.block_in_epoch = epoch_info.block_in_epoch;
         self.network_status.progress = epoch_info.progress;
 
-        match rpc.fetch_validator_count().await {
+        match validator_count {
             Ok(count) => self.network_status.validators = count,
             Err(e) => {
                 tracing::warn!("Failed to fetch validator count: {e}");
@@ -1,10 +1,16 @@
 use std::sync::atomic::{AtomicU64, Ordering};
+use std::time::Duration;
 
 use anyhow::{anyhow, Context};
 use serde::{Deserialize, Serialize};
 
 use crate::app::{EvalTaskRow, LeaderboardRow};
 
+const RPC_REQUEST_TIMEOUT: Duration = Duration::from_secs(30);
+/// Keep the RPC connection alive between refresh ticks so each refresh
+/// reuses it instead of paying a fresh TCP + TLS handshake.
+const RPC_TCP_KEEPALIVE: Duration = Duration::from_secs(60);
+
 pub struct RpcClient {
     url: String,
     client: reqwest::Client,
@@ -112,7 +118,11 @@ impl RpcClient {
     pub fn new(url: &str) -> Self {
         Self {
             url: url.to_string(),
-            client: reqwest::Client::new(),
+            client: reqwest::Client::builder()
+                .timeout(RPC_REQUEST_TIMEOUT)
+                .tcp_keepalive(RPC_TCP_KEEPALIVE)
+                .build()
+                .unwrap_or_default(),
             request_id: AtomicU64::new(1),
         }
     }
@@ -168,10 +178,7 @@ impl RpcClient {
         });
         let result = self.call("challenge_call", params).await?;
 
-        let body = result
-            .get("body")
-            .cloned()
-            .unwrap_or_else(|| result.clone());
+        let body = take_field(result, "body");
 
         let raw: Vec<LeaderboardRowRaw> =
             serde_json::from_value(body).context("Failed to parse leaderboard data")?;
@@ -222,10 +229,7 @@ impl RpcClient {
         });
         let result = self.call("evaluation_getProgress", params).await?;
 
-        let progress = result
-            .get("progress")
-            .cloned()
-            .unwrap_or_else(|| result.clone());
+        let progress = take_field(result, "progress");
 
         let raw: Vec<EvalTaskRowRaw> =
             serde_json::from_value(progress).context("Failed to parse evaluation progress")?;
@@ -299,3 +303,13 @@ impl RpcClient {
         self.call("challenge_call", params).await
     }
 }
+
+/// Move `field` out of a JSON-RPC result envelope, falling back to the whole
+/// result when the server returned the payload unwrapped. Taking ownership
+/// avoids deep-copying large leaderboard/progress payloads.
+fn take_field(mut result: serde_json::Value, field: &str) -> serde_json::Value {
+    if let Some(inner) = result.get_mut(field) {
+        return inner.take();
+    }
+    result
+}
@@ -49,15 +49,16 @@ pub fn store_agent_logs(
     logs: &mut AgentLogs,
 ) -> Result<bool, platform_challenge_sdk::ChallengeError> {
     for task_log in &mut logs.task_logs {
-        if task_log.output_preview.len() > MAX_OUTPUT_PREVIEW {
-            task_log.output_preview = task_log.output_preview[..MAX_OUTPUT_PREVIEW].to_string();
-        }
+        let end = truncate_output(&task_log.output_preview, MAX_OUTPUT_PREVIEW).len();
+        task_log.output_preview.truncate(end);
     }
 
-    let serialized = bincode::serialize(logs)
+    // Measure the encoded size without materialising a throwaway buffer;
+    // kv_set serializes the logs itself.
+    let serialized_size = bincode::serialized_size(logs)
         .map_err(|e| platform_challenge_sdk::ChallengeError::Serialization(e.to_string()))?;
 
-    if serialized.len() > MAX_AGENT_LOGS_SIZE {
+    if serialized_size > MAX_AGENT_LOGS_SIZE as u64 {
         return Ok(false);
     }
 
@@ -65,6 +66,19 @@ pub fn store_agent_logs(
     Ok(true)
 }
 
+/// Borrow at most `max_len` bytes of `output`, backing off to the previous
+/// UTF-8 character boundary so the cut never splits a code point.
+pub fn truncate_output(output: &str, max_len: usize) -> &str {
+    if output.len() <= max_len {
+        return output;
+    }
+    let mut end = max_len;
+    while end > 0 && !output.is_char_boundary(end) {
+        end -= 1;
+    }
+    &output[..end]
+}
+
 pub fn get_agent_logs(db: &ChallengeDatabase, hotkey: &str, epoch: u64) -> Option<AgentLogs> {
     db.kv_get::<AgentLogs>(&logs_key(hotkey, epoch))
         .ok()
@@ -1,4 +1,9 @@
+use std::collections::{BTreeMap, HashSet, VecDeque};
+use std::sync::{Arc, Mutex};
+
+use aho_corasick::AhoCorasick;
 use platform_challenge_sdk::ChallengeDatabase;
+use sha2::{Digest, Sha256};
 
 use crate::types::{AstValidationResult, WhitelistConfig};
 
@@ -19,76 +24,294 @@ pub fn validate_ast(
     code: &str,
 ) -> AstValidationResult {
     let config = get_whitelist_config(db);
+    let cache_key = analysis_cache_key(&config, code);
+    let Findings {
+        violations,
+        warnings,
+    } = match cached_findings(&cache_key) {
+        Some(findings) => findings,
+        None => {
+            let findings = analyze(&config, code);
+            cache_findings(cache_key, &findings);
+            findings
+        }
+    };
+
+    let passed = violations.is_empty();
+
+    let result = AstValidationResult {
+        submission_id: submission_id.to_string(),
+        passed,
+        violations,
+        warnings,
+    };
+
+    let key = format!("ast_result:{}", submission_id);
+    let _ = db.kv_set(&key, &result);
+
+    result
+}
+
+pub fn get_ast_result(db: &ChallengeDatabase, submission_id: &str) -> Option<AstValidationResult> {
+    let key = format!("ast_result:{}", submission_id);
+    db.kv_get::<AstValidationResult>(&key).ok().flatten()
+}
+
+const FINDINGS_CACHE_CAPACITY: usize = 256;
+
+/// Static analysis output for one piece of code under one whitelist config.
+#[derive(Clone)]
+struct Findings {
+    violations: Vec<String>,
+    warnings: Vec<String>,
+}
+
+/// Findings of recent analyses in this process, keyed by content address.
+/// Evaluations each get a fresh database, so the cache lives in memory; it
+/// is bounded and evicts the oldest entry first.
+struct FindingsCache {
+    entries: BTreeMap<[u8; 32], Findings>,
+    order: VecDeque<[u8; 32]>,
+}
+
+static FINDINGS_CACHE: Mutex<FindingsCache> = Mutex::new(FindingsCache {
+    entries: BTreeMap::new(),
+    order: VecDeque::new(),
+});
+
+/// Content address of an analysis: the findings depend only on the whitelist
+/// config and the code, so code resubmitted to this process is not scanned
+/// again. The submitter-provided package hash is not trusted for this.
+fn analysis_cache_key(config: &WhitelistConfig, code: &str) -> [u8; 32] {
+    let mut hasher = Sha256::new();
+    for list in [
+        &config.allowed_imports,
+        &config.forbidden_builtins,
+        &config.forbidden_patterns,
+    ] {
+        for entry in list {
+            hasher.update(entry.as_bytes());
+            hasher.update([0u8]);
+        }
+        hasher.update([1u8]);
+    }
+    hasher.update(code.as_bytes());
+    hasher.finalize().into()
+}
+
+fn cached_findings(cache_key: &[u8; 32]) -> Option<Findings> {
+    let cache = FINDINGS_CACHE.lock().ok()?;
+    cache.entries.get(cache_key).cloned()
+}
+
+fn cache_findings(cache_key: [u8; 32], findings: &Findings) {
+    let mut cache = match FINDINGS_CACHE.lock() {
+        Ok(cache) => cache,
+        Err(_) => return,
+    };
+    if cache.entries.insert(cache_key, findings.clone()).is_none() {
+        cache.order.push_back(cache_key);
+    }
+    while cache.order.len() > FINDINGS_CACHE_CAPACITY {
+        if let Some(oldest) = cache.order.pop_front() {
+            cache.entries.remove(&oldest);
+        }
+    }
+}
+
+fn analyze(config: &WhitelistConfig, code: &str) -> Findings {
     let mut violations = Vec::new();
     let mut warnings = Vec::new();
 
+    // Builtin calls and suspicious patterns are matched together: one
+    // automaton pass per line instead of a substring search per needle.
+    let mut needles: Vec<String> = config
+        .forbidden_builtins
+        .iter()
+        .map(|builtin| format!("{}(", builtin))
+        .collect();
+    needles.extend(config.forbidden_patterns.iter().cloned());
+    let matcher = needle_matcher(&needles);
+    let mut hits = vec![false; needles.len()];
+    let allowed_imports: HashSet<&str> =
+        config.allowed_imports.iter().map(String::as_str).collect();
+
     for line in code.lines() {
         let trimmed = line.trim();
 
-        if trimmed.starts_with("import ") || trimmed.starts_with("from ") {
-            let module = extract_import_module(trimmed);
-            if !module.is_empty() && !is_import_allowed(&module, &config.allowed_imports) {
+        for module in import_roots(trimmed) {
+            if !allowed_imports.contains(module) {
                 violations.push(format!("Forbidden import: {}", module));
             }
         }
 
-        for builtin in &config.forbidden_builtins {
-            if trimmed.contains(&format!("{}(", builtin)) {
+        mark_needles(matcher.as_deref(), &needles, trimmed, &mut hits);
+        let (builtin_hits, pattern_hits) = hits.split_at_mut(config.forbidden_builtins.len());
+
+        for (hit, builtin) in builtin_hits.iter_mut().zip(&config.forbidden_builtins) {
+            if std::mem::take(hit) {
                 violations.push(format!("Forbidden builtin call: {}", builtin));
             }
         }
 
-        for pattern in &config.forbidden_patterns {
-            if trimmed.contains(pattern.as_str()) {
+        for (hit, pattern) in pattern_hits.iter_mut().zip(&config.forbidden_patterns) {
+            if std::mem::take(hit) {
                 warnings.push(format!("Suspicious pattern: {}", pattern));
             }
         }
     }
 
-    let passed = violations.is_empty();
-
-    let result = AstValidationResult {
-        submission_id: submission_id.to_string(),
-        passed,
+    Findings {
         violations,
         warnings,
-    };
+    }
+}
 
-    let key = format!("ast_result:{}", submission_id);
-    let _ = db.kv_set(&key, &result);
+/// Automaton for the current needle set, compiled once and reused across
+/// validations. The whitelist config rarely changes, so it is only rebuilt
+/// when the needles differ from the cached ones.
+fn needle_matcher(needles: &[String]) -> Option<Arc<AhoCorasick>> {
+    static CACHE: Mutex<Option<(Vec<String>, Arc<AhoCorasick>)>> = Mutex::new(None);
 
-    result
+    let mut cache = CACHE.lock().ok()?;
+    if let Some((cached_needles, matcher)) = cache.as_ref() {
+        if cached_needles.as_slice() == needles {
+            return Some(Arc::clone(matcher));
+        }
+    }
+
+    let matcher = Arc::new(AhoCorasick::new(needles).ok()?);
+    *cache = Some((needles.to_vec(), Arc::clone(&matcher)));
+    Some(matcher)
 }
 
-pub fn get_ast_result(db: &ChallengeDatabase, submission_id: &str) -> Option<AstValidationResult> {
-    let key = format!("ast_result:{}", submission_id);
-    db.kv_get::<AstValidationResult>(&key).ok().flatten()
+/// Flag every needle that occurs in `line`. Falls back to plain substring
+/// search if the automaton could not be built for this config.
+fn mark_needles(matcher: Option<&AhoCorasick>, needles: &[String], line: &str, hits: &mut [bool]) {
+    match matcher {
+        Some(matcher) => {
+            for found in matcher.find_overlapping_iter(line) {
+                if let Some(hit) = hits.get_mut(found.pattern().as_usize()) {
+                    *hit = true;
+                }
+            }
+        }
+        None => {
+            for (hit, needle) in hits.iter_mut().zip(needles) {
+                *hit = line.contains(needle.as_str());
+            }
+        }
+    }
 }
 
-fn extract_import_module(line: &str) -> String {
+/// Root modules named by an `import`/`from` line, borrowed from the line
+/// itself. Every module of `import a, b as c` is reported, aliases and
+/// trailing comments are ignored, and `from x import ...` yields only `x`.
+/// Relative imports have an empty root and are skipped.
+fn import_roots(line: &str) -> impl Iterator<Item = &str> {
     let trimmed = line.trim();
-    if let Some(rest) = trimmed.strip_prefix("from ") {
-        rest.split_whitespace()
-            .next()
-            .unwrap_or("")
-            .split('.')
-            .next()
-            .unwrap_or("")
-            .to_string()
+    let trimmed = trimmed.split('#').next().unwrap_or("");
+    let names = if let Some(rest) = trimmed.strip_prefix("from ") {
+        rest.split_whitespace().next().unwrap_or("")
     } else if let Some(rest) = trimmed.strip_prefix("import ") {
-        rest.split(',')
-            .next()
-            .unwrap_or("")
-            .trim()
-            .split('.')
-            .next()
-            .unwrap_or("")
-            .to_string()
+        rest
     } else {
-        String::new()
-    }
+        ""
+    };
+    names
+        .split(',')
+        .filter_map(|name| name.split_whitespace().next())
+        .map(|module| module.split('.').next().unwrap_or(""))
+        .filter(|root| !root.is_empty())
 }
 
-fn is_import_allowed(module: &str, allowed: &[String]) -> bool {
-    allowed.iter().any(|a| a == module)
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn contains_hits(needles: &[String], line: &str) -> Vec<bool> {
+        needles
+            .iter()
+            .map(|needle| line.contains(needle.as_str()))
+            .collect()
+    }
+
+    #[test]
+    fn test_mark_needles_matches_substring_search() {
+        let needles: Vec<String> = ["eval(", "literal_eval(", "os.system", "system", "exec("]
+            .iter()
+            .map(|s| s.to_string())
+            .collect();
+        let matcher = AhoCorasick::new(&needles).unwrap();
+        let lines = [
+            "",
+            "x = ast.literal_eval(data)",
+            "os.system('ls'); exec(code)",
+            "system_prompt = 'eval('",
+            "evaluate(x)",
+            "os.system os.system eval(eval(",
+        ];
+
+        for line in lines {
+            let mut automaton = vec![false; needles.len()];
+            mark_needles(Some(&matcher), &needles, line, &mut automaton);
+            let mut fallback = vec![false; needles.len()];
+            mark_needles(None, &needles, line, &mut fallback);
+
+            let expected = contains_hits(&needles, line);
+            assert_eq!(automaton, expected, "automaton on {:?}", line);
+            assert_eq!(fallback, expected, "fallback on {:?}", line);
+        }
+    }
+
+    #[test]
+    fn test_analyze_reports_builtins_and_patterns_per_line() {
+        let config = WhitelistConfig::default();
+        let code = "import os\n\
+                    result = eval(expr)\n\
+                    os.system('ls')\n\
+                    subprocess.run(cmd); exec(src)\n\
+                    evaluate(x)\n";
+        let findings = analyze(&config, code);
+
+        assert_eq!(
+            findings.violations,
+            vec![
+                "Forbidden builtin call: eval".to_string(),
+                "Forbidden builtin call: exec".to_string(),
+            ]
+        );
+        assert_eq!(
+            findings.warnings,
+            vec![
+                "Suspicious pattern: os.system".to_string(),
+                "Suspicious pattern: subprocess.run".to_string(),
+            ]
+        );
+    }
+
+    fn roots(line: &str) -> Vec<&str> {
+        import_roots(line).collect()
+    }
+
+    #[test]
+    fn test_import_roots_every_module_on_the_line() {
+        assert_eq!(roots("import a, b as c"), vec!["a", "b"]);
+        assert_eq!(roots("import a as x, b"), vec!["a", "b"]);
+        assert_eq!(roots("import os.path, json"), vec!["os", "json"]);
+    }
+
+    #[test]
+    fn test_import_roots_ignores_trailing_comment() {
+        assert_eq!(roots("from x import y  # comment"), vec!["x"]);
+        assert_eq!(roots("import a  # , socket"), vec!["a"]);
+    }
+
+    #[test]
+    fn test_import_roots_skips_relative_and_non_imports() {
+        assert!(roots("from . import sibling").is_empty());
+        assert!(roots("from .pkg import thing").is_empty());
+        assert!(roots("# import socket").is_empty());
+        assert!(roots("x = 1").is_empty());
+    }
 }
@@ -1,7 +1,6 @@
 use std::collections::BTreeMap;
 
 use platform_challenge_sdk::ChallengeDatabase;
-use rand::Rng;
 
 use crate::types::{DatasetConsensusResult, DatasetHistoryEntry};
 
@@ -66,15 +65,16 @@ pub fn generate_random_indices(total_tasks: u32, select_count: u32) -> Vec<u32>
         return Vec::new();
     }
     let count = select_count.min(total_tasks);
-    let mut rng = rand::thread_rng();
-    let mut indices: Vec<u32> = (0..total_tasks).collect();
-
-    for i in (1..indices.len()).rev() {
-        let j = rng.gen_range(0..=i);
-        indices.swap(i, j);
-    }
-
-    indices.truncate(count as usize);
-    indices.sort();
+    // Draw only the `count` indices that are kept instead of shuffling the
+    // whole 0..total_tasks range and discarding the rest.
+    let mut indices: Vec<u32> = rand::seq::index::sample(
+        &mut rand::thread_rng(),
+        total_tasks as usize,
+        count as usize,
+    )
+    .into_iter()
+    .map(|i| i as u32)
+    .collect();
+    indices.sort_unstable();
     indices
 }
@@ -23,6 +23,15 @@ use serde_json::json;
 
 use types::{AgentLogs, ChallengeParams, Submission, TaskLog};
 
+/// Parameters used when a submission carries none: every LLM stage is off.
+static DEFAULT_CHALLENGE_PARAMS: ChallengeParams = ChallengeParams {
+    llm_review_enabled: Some(false),
+    llm_judge_enabled: Some(false),
+    llm_api_url: None,
+    llm_api_key: None,
+    llm_model: None,
+};
+
 pub struct TerminalBenchChallenge {
     pub challenge_id: String,
 }
@@ -65,19 +74,13 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
         )?;
         let db = Arc::new(db);
 
-        let submission: Submission = serde_json::from_value(request.data.clone())
+        let submission: Submission = serde_json::from_value(request.data)
             .map_err(|e| ChallengeError::Evaluation(format!("Invalid submission data: {}", e)))?;
 
         let params = submission
             .challenge_params
-            .clone()
-            .unwrap_or(ChallengeParams {
-                llm_review_enabled: Some(false),
-                llm_judge_enabled: Some(false),
-                llm_api_url: None,
-                llm_api_key: None,
-                llm_model: None,
-            });
+            .as_ref()
+            .unwrap_or(&DEFAULT_CHALLENGE_PARAMS);
 
         let mut status = agent_storage::create_initial_status(&submission.hotkey, submission.epoch);
         let _ = agent_storage::set_evaluation_status(
@@ -109,6 +112,16 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
         let ast_result = ast_validation::validate_ast(&db, &submission.package_hash, &code_str);
 
         update_step(&mut status, "ast_validation", "complete", None);
+        if !ast_result.passed {
+            // Static validation is conclusive on its own, so the LLM reviewer
+            // is never consulted for rejected code.
+            update_step(
+                &mut status,
+                "llm_review",
+                "skipped",
+                Some("rejected by static validation".to_string()),
+            );
+        }
         let _ = agent_storage::set_evaluation_status(
             &db,
             &submission.hotkey,
@@ -121,7 +134,7 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
                 &db,
                 &submission,
                 SaveLogsInput {
-                    task_logs: &[],
+                    task_logs: Vec::new(),
                     ast_result: Some(ast_result.clone()),
                     review_result: None,
                     aggregate_score: 0.0,
@@ -141,7 +154,7 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
 
         let review_result = if params.llm_review_enabled.unwrap_or(false) {
             let result =
-                llm_review::perform_review(&db, &submission.package_hash, &code_str, &params).await;
+                llm_review::perform_review(&db, &submission.package_hash, &code_str, params).await;
             update_step(&mut status, "llm_review", "complete", None);
             let _ = agent_storage::set_evaluation_status(
                 &db,
@@ -155,7 +168,7 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
                     &db,
                     &submission,
                     SaveLogsInput {
-                        task_logs: &[],
+                        task_logs: Vec::new(),
                         ast_result: Some(ast_result),
                         review_result: Some(result.clone()),
                         aggregate_score: 0.0,
@@ -185,8 +198,7 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
             None
         };
 
-        let active_tasks = tasks::get_active_dataset(&db);
-        let mut task_logs = Vec::new();
+        let mut task_logs = Vec::with_capacity(submission.task_results.len());
         let mut passed = 0u32;
         let total = submission.task_results.len() as u32;
 
@@ -195,13 +207,11 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
             if result.success {
                 passed += 1;
             }
-            let preview = result
-                .output
-                .as_deref()
-                .unwrap_or("")
-                .chars()
-                .take(types::MAX_OUTPUT_PREVIEW)
-                .collect::<String>();
+            let preview = agent_storage::truncate_output(
+                result.output.as_deref().unwrap_or(""),
+                types::MAX_OUTPUT_PREVIEW,
+            )
+            .to_string();
             task_logs.push(TaskLog {
                 instance_id: result.instance_id.clone(),
                 success: result.success,
@@ -255,7 +265,7 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
             &db,
             &submission,
             SaveLogsInput {
-                task_logs: &task_logs,
+                task_logs,
                 ast_result: Some(ast_result),
                 review_result,
                 aggregate_score: aggregate,
@@ -264,8 +274,6 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
             },
         );
 
-        let _ = active_tasks;
-
         Ok(EvaluationResponse::success(
             &request.request_id,
             final_score,
@@ -288,7 +296,7 @@ impl platform_challenge_sdk::server::ServerChallenge for TerminalBenchChallenge
         let mut errors = Vec::new();
         let mut warnings = Vec::new();
 
-        let submission: Result<Submission, _> = serde_json::from_value(request.data.clone());
+        let submission: Result<Submission, _> = serde_json::from_value(request.data);
         match submission {
             Ok(sub) => {
                 if sub.hotkey.is_empty() {
@@ -344,8 +352,8 @@ fn update_step(
     }
 }
 
-struct SaveLogsInput<'a> {
-    task_logs: &'a [TaskLog],
+struct SaveLogsInput {
+    task_logs: Vec<TaskLog>,
     ast_result: Option<types::AstValidationResult>,
     review_result: Option<types::LlmReviewResult>,
     aggregate_score: f64,
@@ -356,12 +364,12 @@ struct SaveLogsInput<'a> {
 fn save_logs(
     db: &platform_challenge_sdk::ChallengeDatabase,
     submission: &Submission,
-    input: SaveLogsInput<'_>,
+    input: SaveLogsInput,
 ) -> Result<bool, ChallengeError> {
     let mut logs = AgentLogs {
         hotkey: submission.hotkey.clone(),
         epoch: submission.epoch,
-        task_logs: input.task_logs.to_vec(),
+        task_logs: input.task_logs,
         ast_result: input.ast_result,
         review_result: input.review_result,
         aggregate_score: input.aggregate_score,
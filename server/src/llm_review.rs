@@ -1,8 +1,60 @@
+use std::collections::{BTreeMap, VecDeque};
+use std::fmt::Write as _;
+use std::sync::{Mutex, OnceLock};
+use std::time::{Duration, Instant};
+
 use platform_challenge_sdk::ChallengeDatabase;
-use serde_json::json;
+use rand::Rng;
+use serde::de::DeserializeOwned;
+use serde::{Deserialize, Serialize};
+use serde_json::value::RawValue;
+use sha2::{Digest, Sha256};
 
 use crate::types::{ChallengeParams, LlmReviewResult, SingleReview};
 
+const LLM_REQUEST_TIMEOUT: Duration = Duration::from_secs(120);
+const LLM_POOL_MAX_IDLE_PER_HOST: usize = 20;
+const LLM_POOL_IDLE_TIMEOUT: Duration = Duration::from_secs(90);
+const MAX_REVIEW_ATTEMPTS: u32 = 3;
+const RETRY_BASE_DELAY: Duration = Duration::from_millis(500);
+const MAX_RETRY_DELAY: Duration = Duration::from_secs(30);
+const RETRY_JITTER_MS: u64 = 500;
+const REVIEW_CACHE_TTL: Duration = Duration::from_secs(30 * 24 * 60 * 60);
+const REVIEW_CACHE_CAPACITY: usize = 256;
+const MAX_REVIEW_CODE_BYTES: usize = 50_000;
+const REVIEW_CODE_HEAD_BYTES: usize = 30_000;
+const REVIEW_CODE_TAIL_BYTES: usize = 10_000;
+
+/// Static reviewer instructions. They are sent ahead of the agent code and
+/// kept byte-identical across reviews so providers can serve the prefix from
+/// their prompt cache; only the code varies per request.
+const REVIEW_SYSTEM_PROMPT: &str = "You are a security code reviewer.";
+const REVIEW_RULES: &str = "Review the Python agent code for security issues. \
+Check for: malicious code, data exfiltration, unauthorized network access, \
+resource abuse, and code injection. \
+Respond with exactly this JSON shape: \
+{\"approved\": bool, \"score\": number from 0.0 to 1.0, \"explanation\": string}";
+
+/// Process-wide HTTP client for LLM calls.
+///
+/// Retries and consecutive reviews reuse pooled keep-alive connections
+/// instead of paying a fresh TCP + TLS handshake on every request. HTTP/2 is
+/// negotiated over ALPN where the provider supports it, and responses are
+/// accepted gzip-compressed.
+fn http_client() -> &'static reqwest::Client {
+    static CLIENT: OnceLock<reqwest::Client> = OnceLock::new();
+    CLIENT.get_or_init(|| {
+        reqwest::Client::builder()
+            .pool_max_idle_per_host(LLM_POOL_MAX_IDLE_PER_HOST)
+            .pool_idle_timeout(LLM_POOL_IDLE_TIMEOUT)
+            .tcp_keepalive(LLM_POOL_IDLE_TIMEOUT)
+            .gzip(true)
+            .timeout(LLM_REQUEST_TIMEOUT)
+            .build()
+            .unwrap_or_default()
+    })
+}
+
 pub fn select_reviewers(validators_json: &[u8], submission_hash: &[u8], offset: u8) -> Vec<String> {
     let validators: Vec<String> = serde_json::from_slice(validators_json).unwrap_or_default();
     if validators.is_empty() {
@@ -25,7 +77,7 @@ pub fn select_reviewers(validators_json: &[u8], submission_hash: &[u8], offset:
     selected
 }
 
-pub fn aggregate_reviews(results: &[LlmReviewResult]) -> LlmReviewResult {
+pub fn aggregate_reviews(results: Vec<LlmReviewResult>) -> LlmReviewResult {
     if results.is_empty() {
         return LlmReviewResult {
             submission_id: String::new(),
@@ -38,15 +90,21 @@ pub fn aggregate_reviews(results: &[LlmReviewResult]) -> LlmReviewResult {
     }
 
     let submission_id = results[0].submission_id.clone();
-    let total = results.len() as f64;
-    let approved_count = results.iter().filter(|r| r.approved).count();
-    let avg_score = results.iter().map(|r| r.score).sum::<f64>() / total;
-    let approved = approved_count as f64 / total > 0.5;
+    let reviewer_count = results.len();
+    let total = reviewer_count as f64;
 
+    // One pass tallies approvals and scores while moving the owned reviews
+    // into the aggregate rather than cloning them.
+    let mut approved_count = 0usize;
+    let mut score_sum = 0.0;
     let mut all_reviews = Vec::new();
     for r in results {
-        all_reviews.extend(r.reviews.clone());
+        approved_count += usize::from(r.approved);
+        score_sum += r.score;
+        all_reviews.extend(r.reviews);
     }
+    let avg_score = score_sum / total;
+    let approved = approved_count as f64 / total > 0.5;
 
     LlmReviewResult {
         submission_id,
@@ -54,11 +112,9 @@ pub fn aggregate_reviews(results: &[LlmReviewResult]) -> LlmReviewResult {
         score: avg_score,
         explanation: format!(
             "{}/{} reviewers approved (avg score: {:.2})",
-            approved_count,
-            results.len(),
-            avg_score
+            approved_count, reviewer_count, avg_score
         ),
-        reviewer_count: results.len() as u32,
+        reviewer_count: reviewer_count as u32,
         reviews: all_reviews,
     }
 }
@@ -83,36 +139,51 @@ pub async fn perform_review(
         }
     };
 
+    if code.trim().is_empty() {
+        return LlmReviewResult {
+            submission_id: submission_id.to_string(),
+            approved: true,
+            score: 1.0,
+            explanation: "LLM review skipped: no code to review".to_string(),
+            reviewer_count: 0,
+            reviews: Vec::new(),
+        };
+    }
+
     let api_key = params.llm_api_key.as_deref().unwrap_or("").to_string();
     let model = params.llm_model.as_deref().unwrap_or("gpt-4").to_string();
 
-    let prompt = format!(
-        "Review this Python agent code for security issues. \
-         Check for: malicious code, data exfiltration, unauthorized network access, \
-         resource abuse, and code injection. \
-         Respond with JSON: {{\"approved\": true/false, \"score\": 0.0-1.0, \"explanation\": \"...\"}}\n\n\
-         Code:\n```python\n{}\n```",
-        code
-    );
-
-    let request_body = json!({
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "You are a security code reviewer."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.1,
-        "max_tokens": 500
-    });
+    let cache_key = review_cache_key(&api_url, &model, code);
+    if let Some(mut review) = get_cached_review(&cache_key) {
+        review.submission_id = submission_id.to_string();
+        let key = format!("review_result:{}", submission_id);
+        let _ = db.kv_set(&key, &review);
+        return review;
+    }
 
-    let client = reqwest::Client::new();
-    let mut request = client.post(&api_url).json(&request_body);
+    let mut prompt = String::with_capacity(code.len().min(MAX_REVIEW_CODE_BYTES) + 96);
+    prompt.push_str("Code:\n```python\n");
+    push_review_code(&mut prompt, code);
+    prompt.push_str("\n```");
 
-    if !api_key.is_empty() {
-        request = request.header("Authorization", format!("Bearer {}", api_key));
-    }
+    let request_body = ChatRequest {
+        model: &model,
+        messages: (
+            review_system_message(),
+            ChatRequestMessage {
+                role: "user",
+                content: MessageContent::Text(&prompt),
+            },
+        ),
+        temperature: 0.1,
+        max_tokens: 500,
+        stream: true,
+        response_format: supports_json_mode(&model).then_some(ResponseFormat {
+            kind: "json_object",
+        }),
+    };
 
-    let response = match request.send().await {
+    let response = match send_review_request(&api_url, &api_key, &request_body).await {
         Ok(resp) => resp,
         Err(e) => {
             return LlmReviewResult {
@@ -126,8 +197,8 @@ pub async fn perform_review(
         }
     };
 
-    let body = match response.text().await {
-        Ok(text) => text,
+    let review = match read_review_response(response, submission_id).await {
+        Ok(review) => review,
         Err(e) => {
             return LlmReviewResult {
                 submission_id: submission_id.to_string(),
@@ -140,7 +211,9 @@ pub async fn perform_review(
         }
     };
 
-    let review = parse_llm_response(&body, submission_id);
+    if !review.reviews.is_empty() {
+        cache_review(cache_key, &review);
+    }
 
     let key = format!("review_result:{}", submission_id);
     let _ = db.kv_set(&key, &review);
@@ -148,13 +221,465 @@ pub async fn perform_review(
     review
 }
 
+// Wire types for the chat-completion API. Requests borrow the prompt pieces
+// so the agent code is serialized straight into the request body without an
+// intermediate `serde_json::Value` copy. Responses only declare the fields
+// the reviewer reads, so they deserialize without building a value tree.
+
+#[derive(Serialize)]
+struct ChatRequest<'a> {
+    model: &'a str,
+    messages: (&'a RawValue, ChatRequestMessage<'a>),
+    temperature: f64,
+    max_tokens: u32,
+    stream: bool,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    response_format: Option<ResponseFormat>,
+}
+
+#[derive(Serialize)]
+struct ResponseFormat {
+    #[serde(rename = "type")]
+    kind: &'static str,
+}
+
+/// Model families that accept `response_format: {"type": "json_object"}`.
+/// Older chat models such as the `gpt-4` default reject the parameter with a
+/// 400, so they rely on the prompt alone for JSON output.
+const JSON_MODE_MODEL_PREFIXES: &[&str] = &[
+    "gpt-4o",
+    "gpt-4.1",
+    "gpt-4-turbo",
+    "gpt-4-1106",
+    "gpt-4-0125",
+    "gpt-3.5-turbo-1106",
+    "gpt-3.5-turbo-0125",
+    "o3",
+    "o4",
+];
+
+fn supports_json_mode(model: &str) -> bool {
+    // Provider-routed names such as `openai/gpt-4o` match on the model part.
+    let name = model.rsplit('/').next().unwrap_or(model);
+    JSON_MODE_MODEL_PREFIXES
+        .iter()
+        .any(|prefix| name.starts_with(prefix))
+}
+
+#[derive(Serialize)]
+struct ChatRequestMessage<'a> {
+    role: &'static str,
+    content: MessageContent<'a>,
+}
+
+#[derive(Serialize)]
+#[serde(untagged)]
+enum MessageContent<'a> {
+    Text(&'a str),
+    Blocks(&'a [ContentBlock]),
+}
+
+#[derive(Serialize)]
+struct ContentBlock {
+    #[serde(rename = "type")]
+    kind: &'static str,
+    text: &'static str,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    cache_control: Option<CacheControl>,
+}
+
+#[derive(Serialize)]
+struct CacheControl {
+    #[serde(rename = "type")]
+    kind: &'static str,
+}
+
+static REVIEW_SYSTEM_BLOCKS: [ContentBlock; 2] = [
+    ContentBlock {
+        kind: "text",
+        text: REVIEW_SYSTEM_PROMPT,
+        cache_control: None,
+    },
+    ContentBlock {
+        kind: "text",
+        text: REVIEW_RULES,
+        cache_control: Some(CacheControl { kind: "ephemeral" }),
+    },
+];
+
+/// The system message never changes, so it is serialized once and spliced
+/// into every request body verbatim.
+fn review_system_message() -> &'static RawValue {
+    static MESSAGE: OnceLock<Box<RawValue>> = OnceLock::new();
+    MESSAGE.get_or_init(|| {
+        let message = ChatRequestMessage {
+            role: "system",
+            content: MessageContent::Blocks(&REVIEW_SYSTEM_BLOCKS),
+        };
+        serde_json::value::to_raw_value(&message).unwrap_or_default()
+    })
+}
+
+#[derive(Deserialize)]
+struct ChatCompletion {
+    #[serde(default)]
+    choices: Vec<ChatChoice>,
+}
+
+#[derive(Deserialize)]
+struct ChatChoice {
+    message: ChatContent,
+}
+
+#[derive(Deserialize)]
+struct ChatCompletionChunk {
+    #[serde(default)]
+    choices: Vec<ChatChunkChoice>,
+}
+
+#[derive(Deserialize)]
+struct ChatChunkChoice {
+    delta: ChatContent,
+}
+
+#[derive(Deserialize)]
+struct ChatContent {
+    #[serde(default)]
+    content: Option<String>,
+}
+
+/// The verdict object. `approved` is required: an object without it is some
+/// other JSON the model wrote, not the verdict.
+#[derive(Deserialize)]
+struct ReviewVerdict {
+    approved: bool,
+    #[serde(default = "default_verdict_score")]
+    score: f64,
+    #[serde(default = "default_verdict_explanation")]
+    explanation: String,
+}
+
+fn default_verdict_score() -> f64 {
+    0.5
+}
+
+fn default_verdict_explanation() -> String {
+    "No explanation provided".to_string()
+}
+
+/// Parsed verdicts of this process, keyed by content address, so identical
+/// agent code is not sent to the LLM again until its entry expires. The
+/// evaluation database is not shared between evaluations, so the cache lives
+/// in memory and is bounded, evicting the oldest entry first.
+struct ReviewCache {
+    entries: BTreeMap<[u8; 32], (Instant, LlmReviewResult)>,
+    order: VecDeque<[u8; 32]>,
+}
+
+static REVIEW_CACHE: Mutex<ReviewCache> = Mutex::new(ReviewCache {
+    entries: BTreeMap::new(),
+    order: VecDeque::new(),
+});
+
+/// Cache key over everything that determines the verdict: the endpoint, the
+/// model, the static instructions and the agent code itself.
+fn review_cache_key(api_url: &str, model: &str, code: &str) -> [u8; 32] {
+    let mut hasher = Sha256::new();
+    for part in [api_url, model, REVIEW_SYSTEM_PROMPT, REVIEW_RULES, code] {
+        hasher.update(part.as_bytes());
+        hasher.update([0u8]);
+    }
+    hasher.finalize().into()
+}
+
+fn get_cached_review(cache_key: &[u8; 32]) -> Option<LlmReviewResult> {
+    let cache = REVIEW_CACHE.lock().ok()?;
+    let (cached_at, review) = cache.entries.get(cache_key)?;
+    if cached_at.elapsed() > REVIEW_CACHE_TTL {
+        return None;
+    }
+    Some(review.clone())
+}
+
+fn cache_review(cache_key: [u8; 32], review: &LlmReviewResult) {
+    let mut cache = match REVIEW_CACHE.lock() {
+        Ok(cache) => cache,
+        Err(_) => return,
+    };
+    let entry = (Instant::now(), review.clone());
+    if cache.entries.insert(cache_key, entry).is_none() {
+        cache.order.push_back(cache_key);
+    }
+    while cache.order.len() > REVIEW_CACHE_CAPACITY {
+        if let Some(oldest) = cache.order.pop_front() {
+            cache.entries.remove(&oldest);
+        }
+    }
+}
+
+/// Append `code` to the prompt, bounding oversized submissions by keeping the
+/// head and tail around a truncation marker. Prefill cost scales with the
+/// input, and normal-sized agents are passed through untouched. The pieces
+/// are written straight into the prompt rather than assembled separately.
+fn push_review_code(prompt: &mut String, code: &str) {
+    if code.len() <= MAX_REVIEW_CODE_BYTES {
+        prompt.push_str(code);
+        return;
+    }
+
+    let mut head_end = REVIEW_CODE_HEAD_BYTES;
+    while !code.is_char_boundary(head_end) {
+        head_end -= 1;
+    }
+    let mut tail_start = code.len() - REVIEW_CODE_TAIL_BYTES;
+    while !code.is_char_boundary(tail_start) {
+        tail_start += 1;
+    }
+
+    prompt.push_str(&code[..head_end]);
+    let _ = write!(
+        prompt,
+        "\n# ... [TRUNCATED {} bytes] ...\n",
+        tail_start - head_end
+    );
+    prompt.push_str(&code[tail_start..]);
+}
+
+/// Send a review request on the shared client.
+///
+/// Transport failures and rate-limit / overload responses are retried with
+/// exponential backoff plus jitter, never sooner than the provider's
+/// `Retry-After` asks for.
+async fn send_review_request(
+    api_url: &str,
+    api_key: &str,
+    body: &ChatRequest<'_>,
+) -> Result<reqwest::Response, reqwest::Error> {
+    // Serialize the body and build the auth header once; retries send a
+    // clone of the finished request rather than rebuilding it.
+    let build = || {
+        let request = http_client().post(api_url).json(body);
+        if api_key.is_empty() {
+            request
+        } else {
+            request.bearer_auth(api_key)
+        }
+    };
+    let template = build();
+    let mut attempt = 1;
+    loop {
+        let request = template.try_clone().unwrap_or_else(build);
+
+        let retry_after = match request.send().await {
+            Ok(resp) if attempt < MAX_REVIEW_ATTEMPTS && is_retryable_status(resp.status()) => {
+                retry_after(&resp)
+            }
+            Ok(resp) => return Ok(resp),
+            Err(e) if attempt < MAX_REVIEW_ATTEMPTS && (e.is_connect() || e.is_timeout()) => None,
+            Err(e) => return Err(e),
+        };
+
+        tokio::time::sleep(backoff_delay(attempt, retry_after)).await;
+        attempt += 1;
+    }
+}
+
+fn is_retryable_status(status: reqwest::StatusCode) -> bool {
+    status == reqwest::StatusCode::TOO_MANY_REQUESTS
+        || status == reqwest::StatusCode::SERVICE_UNAVAILABLE
+}
+
+fn retry_after(response: &reqwest::Response) -> Option<Duration> {
+    let secs = response
+        .headers()
+        .get(reqwest::header::RETRY_AFTER)?
+        .to_str()
+        .ok()?
+        .trim()
+        .parse::<u64>()
+        .ok()?;
+    Some(Duration::from_secs(secs))
+}
+
+fn backoff_delay(attempt: u32, retry_after: Option<Duration>) -> Duration {
+    let exponential = RETRY_BASE_DELAY.saturating_mul(1 << (attempt - 1).min(16));
+    let jitter = Duration::from_millis(rand::thread_rng().gen_range(0..RETRY_JITTER_MS));
+    exponential
+        .max(retry_after.unwrap_or_default())
+        .min(MAX_RETRY_DELAY)
+        + jitter
+}
+
+/// Read the review out of either an SSE stream or a plain JSON completion,
+/// depending on what the provider answered with.
+async fn read_review_response(
+    response: reqwest::Response,
+    submission_id: &str,
+) -> Result<LlmReviewResult, reqwest::Error> {
+    let is_event_stream = response
+        .headers()
+        .get(reqwest::header::CONTENT_TYPE)
+        .and_then(|v| v.to_str().ok())
+        .map(|v| v.starts_with("text/event-stream"))
+        .unwrap_or(false);
+
+    if is_event_stream {
+        let content = read_streamed_content(response).await?;
+        return Ok(parse_review_content(&content, submission_id));
+    }
+
+    // serde_json validates UTF-8 as it parses, so decode the raw body bytes
+    // directly rather than first copying them into a String.
+    let body = response.bytes().await?;
+    Ok(parse_llm_response(&body, submission_id))
+}
+
+/// Accumulate streamed `delta.content` fragments, dropping the connection as
+/// soon as a balanced JSON object in the content is the review verdict.
+async fn read_streamed_content(mut response: reqwest::Response) -> Result<String, reqwest::Error> {
+    let mut pending: Vec<u8> = Vec::new();
+    let mut content = String::new();
+    let mut scanner = JsonObjectScanner::default();
+
+    while let Some(chunk) = response.chunk().await? {
+        pending.extend_from_slice(&chunk);
+
+        // Walk every complete line in the buffer with a cursor and drop them
+        // in one drain, rather than copying out and shifting per line.
+        let mut consumed = 0;
+        while let Some(newline) = pending[consumed..].iter().position(|&b| b == b'\n') {
+            let line = &pending[consumed..consumed + newline + 1];
+            consumed += newline + 1;
+            let data = match sse_data(line) {
+                Some(data) => data,
+                None => continue,
+            };
+            if data == b"[DONE]" {
+                return Ok(content);
+            }
+
+            let chunk: ChatCompletionChunk = match serde_json::from_slice(data) {
+                Ok(chunk) => chunk,
+                Err(_) => continue,
+            };
+            let delta = chunk
+                .choices
+                .into_iter()
+                .next()
+                .and_then(|choice| choice.delta.content);
+            if let Some(delta) = delta {
+                content.push_str(&delta);
+                // Objects quoted in the reasoning (placeholders, examples)
+                // are skipped; the scanner carries on after each of them.
+                while let Some((start, end)) = scanner.advance(&content) {
+                    if is_review_verdict(&content[start..end]) {
+                        content.truncate(end);
+                        content.drain(..start);
+                        return Ok(content);
+                    }
+                }
+            }
+        }
+        pending.drain(..consumed);
+    }
+
+    Ok(content)
+}
+
+fn sse_data(line: &[u8]) -> Option<&[u8]> {
+    let line = line.strip_suffix(b"\n").unwrap_or(line);
+    let line = line.strip_suffix(b"\r").unwrap_or(line);
+    let data = line.strip_prefix(b"data:")?;
+    Some(data.strip_prefix(b" ").unwrap_or(data))
+}
+
+/// Incremental brace matcher over a growing buffer of model output.
+///
+/// Braces inside string literals (including escaped quotes) are ignored, so
+/// the outermost object is reported closed exactly once it is balanced.
+#[derive(Default)]
+struct JsonObjectScanner {
+    pos: usize,
+    start: usize,
+    depth: usize,
+    in_string: bool,
+    escaped: bool,
+}
+
+impl JsonObjectScanner {
+    /// Scan text appended since the last call and return the byte range of
+    /// the next top-level `{...}` object once its closing brace arrives.
+    /// Later calls carry on after that object.
+    fn advance(&mut self, text: &str) -> Option<(usize, usize)> {
+        let bytes = text.as_bytes();
+        while self.pos < bytes.len() {
+            let b = bytes[self.pos];
+            self.pos += 1;
+
+            if self.in_string {
+                if self.escaped {
+                    self.escaped = false;
+                } else if b == b'\\' {
+                    self.escaped = true;
+                } else if b == b'"' {
+                    self.in_string = false;
+                }
+                continue;
+            }
+
+            match b {
+                b'{' => {
+                    if self.depth == 0 {
+                        self.start = self.pos - 1;
+                    }
+                    self.depth += 1;
+                }
+                b'}' if self.depth > 0 => {
+                    self.depth -= 1;
+                    if self.depth == 0 {
+                        return Some((self.start, self.pos));
+                    }
+                }
+                b'"' if self.depth > 0 => self.in_string = true,
+                _ => {}
+            }
+        }
+        None
+    }
+}
+
+/// Whether `text` is a JSON object carrying the `approved` flag, as opposed
+/// to some other object the model wrote before its verdict.
+fn is_review_verdict(text: &str) -> bool {
+    serde_json::from_str::<ReviewVerdict>(text).is_ok()
+}
+
+/// Locate the first object in free-form model output (prose, code fences,
+/// trailing commentary) that decodes as `T`. Each `{` candidate is handed
+/// straight to serde_json's streaming decoder, which stops at the end of the
+/// value and ignores whatever follows, so the object is found and parsed in
+/// one go. Placeholders and payloads missing a required field of `T`, such
+/// as the verdict's `approved`, are skipped.
+fn extract_json_object<T: DeserializeOwned>(text: &str) -> Option<T> {
+    let mut search_from = 0;
+    while let Some(pos) = text[search_from..].find('{') {
+        let start = search_from + pos;
+        let mut values = serde_json::Deserializer::from_str(&text[start..]).into_iter::<T>();
+        if let Some(Ok(value)) = values.next() {
+            return Some(value);
+        }
+        search_from = start + 1;
+    }
+    None
+}
+
 pub fn get_review_result(db: &ChallengeDatabase, submission_id: &str) -> Option<LlmReviewResult> {
     let key = format!("review_result:{}", submission_id);
     db.kv_get::<LlmReviewResult>(&key).ok().flatten()
 }
 
-fn parse_llm_response(body: &str, submission_id: &str) -> LlmReviewResult {
-    let json_val: serde_json::Value = match serde_json::from_str(body) {
+fn parse_llm_response(body: &[u8], submission_id: &str) -> LlmReviewResult {
+    let completion: ChatCompletion = match serde_json::from_slice(body) {
         Ok(v) => v,
         Err(_) => {
             return LlmReviewResult {
@@ -168,42 +693,221 @@ fn parse_llm_response(body: &str, submission_id: &str) -> LlmReviewResult {
         }
     };
 
-    let content = json_val
-        .pointer("/choices/0/message/content")
-        .and_then(|v| v.as_str())
-        .unwrap_or("");
-
-    let review_json: serde_json::Value = serde_json::from_str(content).unwrap_or(json!({
-        "approved": true,
-        "score": 0.5,
-        "explanation": "Could not parse review content"
-    }));
-
-    let approved = review_json
-        .get("approved")
-        .and_then(|v| v.as_bool())
-        .unwrap_or(true);
-    let score = review_json
-        .get("score")
-        .and_then(|v| v.as_f64())
-        .unwrap_or(0.5);
-    let explanation = review_json
-        .get("explanation")
-        .and_then(|v| v.as_str())
-        .unwrap_or("No explanation provided")
-        .to_string();
+    let content = completion
+        .choices
+        .into_iter()
+        .next()
+        .and_then(|choice| choice.message.content)
+        .unwrap_or_default();
+
+    parse_review_content(&content, submission_id)
+}
+
+fn parse_review_content(content: &str, submission_id: &str) -> LlmReviewResult {
+    let parsed = serde_json::from_str(content)
+        .ok()
+        .or_else(|| extract_json_object(content));
+    let verdict: ReviewVerdict = match parsed {
+        Some(v) => v,
+        None => {
+            return LlmReviewResult {
+                submission_id: submission_id.to_string(),
+                approved: true,
+                score: 0.5,
+                explanation: "Could not parse review content".to_string(),
+                reviewer_count: 1,
+                reviews: Vec::new(),
+            };
+        }
+    };
 
     LlmReviewResult {
         submission_id: submission_id.to_string(),
-        approved,
-        score,
-        explanation: explanation.clone(),
+        approved: verdict.approved,
+        score: verdict.score,
+        explanation: verdict.explanation.clone(),
         reviewer_count: 1,
         reviews: vec![SingleReview {
             reviewer_id: "llm".to_string(),
-            approved,
-            score,
-            explanation,
+            approved: verdict.approved,
+            score: verdict.score,
+            explanation: verdict.explanation,
         }],
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_json_object_scanner_incremental() {
+        let mut scanner = JsonObjectScanner::default();
+        let mut text = String::from("Verdict: {\"approved\": ");
+        assert_eq!(scanner.advance(&text), None);
+        text.push_str("true, \"detail\": {\"n\": 1}");
+        assert_eq!(scanner.advance(&text), None);
+        text.push_str("} and more {}");
+        let (start, end) = scanner.advance(&text).unwrap();
+        assert_eq!(
+            &text[start..end],
+            "{\"approved\": true, \"detail\": {\"n\": 1}}"
+        );
+    }
+
+    #[test]
+    fn test_json_object_scanner_ignores_braces_in_strings() {
+        let mut scanner = JsonObjectScanner::default();
+        let text = r#"{"explanation": "calls {eval} and \"}\" here"}"#;
+        assert_eq!(scanner.advance(text), Some((0, text.len())));
+    }
+
+    #[test]
+    fn test_json_object_scanner_escape_split_across_chunks() {
+        let mut scanner = JsonObjectScanner::default();
+        let mut text = String::from(r#"{"e": "a\"#);
+        assert_eq!(scanner.advance(&text), None);
+        text.push_str(r#""}"}"#);
+        assert_eq!(scanner.advance(&text), Some((0, text.len())));
+    }
+
+    #[test]
+    fn test_json_object_scanner_ignores_stray_closing_brace() {
+        let mut scanner = JsonObjectScanner::default();
+        let text = "} oops } {\"a\": 1}";
+        let (start, end) = scanner.advance(text).unwrap();
+        assert_eq!(&text[start..end], "{\"a\": 1}");
+    }
+
+    #[test]
+    fn test_json_object_scanner_continues_after_each_object() {
+        let mut scanner = JsonObjectScanner::default();
+        let text = "It formats {name} strings. {\"approved\": false}";
+        let (start, end) = scanner.advance(text).unwrap();
+        assert_eq!(&text[start..end], "{name}");
+        let (start, end) = scanner.advance(text).unwrap();
+        assert_eq!(&text[start..end], "{\"approved\": false}");
+        assert_eq!(scanner.advance(text), None);
+    }
+
+    #[test]
+    fn test_is_review_verdict() {
+        assert!(is_review_verdict("{\"approved\": false, \"score\": 0.1}"));
+        assert!(!is_review_verdict("{name}"));
+        assert!(!is_review_verdict("{\"cmd\": \"ls\"}"));
+    }
+
+    fn event_stream(body: &'static str) -> reqwest::Response {
+        let response = axum::http::Response::builder()
+            .header(reqwest::header::CONTENT_TYPE, "text/event-stream")
+            .body(body)
+            .unwrap();
+        reqwest::Response::from(response)
+    }
+
+    #[tokio::test]
+    async fn test_read_streamed_content_skips_objects_before_the_verdict() {
+        let response = event_stream(
+            "data: {\"choices\":[{\"delta\":{\"content\":\"It formats {name} strings. \"}}]}\n\
+             data: {\"choices\":[{\"delta\":{\"content\":\"{\\\"approved\\\": false}\"}}]}\n\
+             data: [DONE]\n",
+        );
+        let content = read_streamed_content(response).await.unwrap();
+        assert_eq!(content, "{\"approved\": false}");
+    }
+
+    #[test]
+    fn test_parse_review_content_from_prose() {
+        let content = "Here is my verdict:\n\
+            {\"approved\": false, \"score\": 0.2, \"explanation\": \"exfiltrates env\"}\n\
+            Let me know if you need more detail.";
+        let review = parse_review_content(content, "sub");
+        assert!(!review.approved);
+        assert_eq!(review.score, 0.2);
+        assert_eq!(review.explanation, "exfiltrates env");
+        assert_eq!(review.reviews.len(), 1);
+    }
+
+    #[test]
+    fn test_parse_review_content_from_code_fence() {
+        let content = "```json\n{\"approved\": true, \"score\": 0.9, \"explanation\": \"ok\"}\n```";
+        let review = parse_review_content(content, "sub");
+        assert!(review.approved);
+        assert_eq!(review.score, 0.9);
+    }
+
+    #[test]
+    fn test_parse_review_content_skips_stray_braces() {
+        let content = "The agent uses {placeholders} and f\"{x}\" strings. \
+            {\"approved\": false, \"score\": 0.1, \"explanation\": \"uses {eval}\"}";
+        let review = parse_review_content(content, "sub");
+        assert!(!review.approved);
+        assert_eq!(review.explanation, "uses {eval}");
+    }
+
+    #[test]
+    fn test_parse_review_content_skips_objects_without_verdict() {
+        let content = "The agent posts {\"cmd\": \"ls\"} to a remote host.\n\
+            {\"approved\": false, \"score\": 0.1, \"explanation\": \"exfiltration\"}";
+        let review = parse_review_content(content, "sub");
+        assert!(!review.approved);
+        assert_eq!(review.score, 0.1);
+        assert_eq!(review.explanation, "exfiltration");
+    }
+
+    #[test]
+    fn test_parse_review_content_without_verdict() {
+        for content in ["no object here", "{unterminated", "{\"cmd\": \"ls\"}", ""] {
+            let review = parse_review_content(content, "sub");
+            assert_eq!(review.explanation, "Could not parse review content");
+            assert!(review.reviews.is_empty());
+        }
+    }
+
+    #[test]
+    fn test_supports_json_mode() {
+        assert!(supports_json_mode("gpt-4o-mini"));
+        assert!(supports_json_mode("openai/gpt-4.1"));
+        assert!(supports_json_mode("o3-mini"));
+        assert!(!supports_json_mode("gpt-4"));
+        assert!(!supports_json_mode("anthropic/claude-3-5-sonnet"));
+    }
+
+    #[tokio::test]
+    async fn test_read_streamed_content_stops_at_closing_brace() {
+        let response = event_stream(
+            ": keep-alive\r\n\
+             data: {\"choices\":[{\"delta\":{\"content\":\"Sure: {\\\"approved\\\": \"}}]}\r\n\
+             \r\n\
+             data: {\"choices\":[{\"delta\":{\"role\":\"assistant\"}}]}\n\
+             data:{\"choices\":[{\"delta\":{\"content\":\"false}\\n\\nDone.\"}}]}\n\
+             data: {\"choices\":[{\"delta\":{\"content\":\"ignored\"}}]}\n\
+             data: [DONE]\n",
+        );
+        let content = read_streamed_content(response).await.unwrap();
+        assert_eq!(content, "{\"approved\": false}");
+    }
+
+    #[tokio::test]
+    async fn test_read_streamed_content_returns_partial_content_on_done() {
+        let response = event_stream(
+            "data: {\"choices\":[{\"delta\":{\"content\":\"no verdict\"}}]}\n\
+             data: not json\n\
+             data: [DONE]\n\
+             data: {\"choices\":[{\"delta\":{\"content\":\" after done\"}}]}\n",
+        );
+        let content = read_streamed_content(response).await.unwrap();
+        assert_eq!(content, "no verdict");
+    }
+
+    #[tokio::test]
+    async fn test_read_review_response_parses_streamed_verdict() {
+        let response = event_stream(
+            "data: {\"choices\":[{\"delta\":{\"content\":\"{\\\"approved\\\": false, \\\"score\\\": 0.1, \\\"explanation\\\": \\\"bad\\\"}\"}}]}\n",
+        );
+        let review = read_review_response(response, "sub-1").await.unwrap();
+        assert!(!review.approved);
+        assert_eq!(review.score, 0.1);
+        assert_eq!(review.reviews.len(), 1);
+    }
+}
@@ -1,4 +1,5 @@
-use std::sync::Arc;
+use std::sync::{Arc, Mutex, PoisonError};
+use std::time::{Duration, Instant};
 
 use anyhow::Result;
 use async_trait::async_trait;
@@ -84,9 +85,19 @@ struct DecayState {
     current_burn_percent: f64,
 }
 
+/// How long a computed leaderboard is served before the key scan is rerun.
+/// Scores written through `store_score` invalidate it immediately.
+const LEADERBOARD_CACHE_TTL: Duration = Duration::from_secs(5);
+
+type CachedLeaderboard = (Instant, Arc<Vec<LeaderboardEntry>>);
+
 struct TerminalBenchChallenge {
     id: String,
     db: Arc<ChallengeDatabase>,
+    leaderboard_cache: Mutex<Option<CachedLeaderboard>>,
+    /// Distinct miners with a score, recounted from the store once per
+    /// process and then kept current by `store_score` under this lock.
+    active_miners: Mutex<Option<u64>>,
 }
 
 impl TerminalBenchChallenge {
@@ -97,12 +108,32 @@ impl TerminalBenchChallenge {
         Ok(Self {
             id: challenge_id.to_string(),
             db: Arc::new(db),
+            leaderboard_cache: Mutex::new(None),
+            active_miners: Mutex::new(None),
         })
     }
 
     fn store_score(&self, hotkey: &str, score: f64) {
         let key = format!("score:{}", hotkey);
+        // Hold the counter lock across the existence check and the write so
+        // concurrent evaluations of the same or different miners cannot
+        // lose an increment.
+        let mut active = self
+            .active_miners
+            .lock()
+            .unwrap_or_else(PoisonError::into_inner);
+        let is_new_miner = self.db.kv_get::<f64>(&key).ok().flatten().is_none();
         let _ = self.db.kv_set(&key, &score);
+        match active.as_mut() {
+            Some(count) if is_new_miner => *count += 1,
+            Some(_) => {}
+            // Not counted yet: the recount includes the key written above.
+            None => *active = Some(self.count_scored_miners()),
+        }
+        drop(active);
+        if let Ok(mut cache) = self.leaderboard_cache.lock() {
+            *cache = None;
+        }
     }
 
     fn get_score(&self, hotkey: &str) -> Option<f64> {
@@ -132,6 +163,24 @@ impl TerminalBenchChallenge {
         let _ = self.db.kv_set(&epoch_key, &epoch);
     }
 
+    /// Leaderboard polling hits this far more often than scores change, so
+    /// reuse the last scan while it is fresh instead of walking every key.
+    fn cached_leaderboard(&self) -> Arc<Vec<LeaderboardEntry>> {
+        if let Ok(cache) = self.leaderboard_cache.lock() {
+            if let Some((built_at, entries)) = cache.as_ref() {
+                if built_at.elapsed() < LEADERBOARD_CACHE_TTL {
+                    return Arc::clone(entries);
+                }
+            }
+        }
+
+        let entries = Arc::new(self.get_leaderboard());
+        if let Ok(mut cache) = self.leaderboard_cache.lock() {
+            *cache = Some((Instant::now(), Arc::clone(&entries)));
+        }
+        entries
+    }
+
     fn get_leaderboard(&self) -> Vec<LeaderboardEntry> {
         let keys = self.db.kv_keys().unwrap_or_default();
         let mut hotkeys: Vec<String> = keys
@@ -190,8 +239,7 @@ impl TerminalBenchChallenge {
             .ok()
             .flatten()
             .unwrap_or(0);
-        let keys = self.db.kv_keys().unwrap_or_default();
-        let active_miners = keys.iter().filter(|k| k.starts_with("score:")).count() as u64;
+        let active_miners = self.active_miners();
         let current_epoch: u64 = self
             .db
             .kv_get::<u64>("current_epoch")
@@ -206,6 +254,28 @@ impl TerminalBenchChallenge {
         }
     }
 
+    /// Number of miners with a stored score, maintained by `store_score`.
+    /// The score keys are scanned once per process to seed it.
+    fn active_miners(&self) -> u64 {
+        let mut active = self
+            .active_miners
+            .lock()
+            .unwrap_or_else(PoisonError::into_inner);
+        match *active {
+            Some(count) => count,
+            None => {
+                let count = self.count_scored_miners();
+                *active = Some(count);
+                count
+            }
+        }
+    }
+
+    fn count_scored_miners(&self) -> u64 {
+        let keys = self.db.kv_keys().unwrap_or_default();
+        keys.iter().filter(|k| k.starts_with("score:")).count() as u64
+    }
+
     fn get_decay_state(&self) -> Option<DecayState> {
         self.db
             .kv_get::<DecayState>("top_agent_state")
@@ -316,7 +386,7 @@ impl ServerChallenge for TerminalBenchChallenge {
     }
 
     async fn evaluate(&self, req: EvaluationRequest) -> Result<EvaluationResponse, ChallengeError> {
-        let submission: SubmissionData = serde_json::from_value(req.data.clone()).map_err(|e| {
+        let submission: SubmissionData = serde_json::from_value(req.data).map_err(|e| {
             ChallengeError::Evaluation(format!("Failed to parse submission data: {}", e))
         })?;
 
@@ -409,8 +479,7 @@ impl ServerChallenge for TerminalBenchChallenge {
             });
         }
 
-        let submission: std::result::Result<SubmissionData, _> =
-            serde_json::from_value(req.data.clone());
+        let submission: std::result::Result<SubmissionData, _> = serde_json::from_value(req.data);
 
         match submission {
             Ok(data) => {
@@ -472,8 +541,8 @@ impl ServerChallenge for TerminalBenchChallenge {
     async fn handle_route(&self, _ctx: &ChallengeContext, req: RouteRequest) -> RouteResponse {
         match (req.method.as_str(), req.path.as_str()) {
             ("GET", "/leaderboard") => {
-                let entries = self.get_leaderboard();
-                RouteResponse::json(&entries)
+                let entries = self.cached_leaderboard();
+                RouteResponse::json(&*entries)
             }
             ("GET", "/stats") => {
                 let stats = self.get_stats();
@@ -249,7 +249,7 @@ fn handle_review_aggregate(request: &RouteRequest) -> RouteResponse {
         Ok(r) => r,
         Err(_) => return RouteResponse::bad_request("Invalid aggregate body"),
     };
-    let aggregated = llm_review::aggregate_reviews(&results);
+    let aggregated = llm_review::aggregate_reviews(results);
     RouteResponse::json(&aggregated)
 }
 
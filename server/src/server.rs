@@ -1,6 +1,6 @@
 use std::collections::HashMap;
 use std::net::SocketAddr;
-use std::sync::Arc;
+use std::sync::{Arc, OnceLock};
 use std::time::Instant;
 
 use axum::extract::{Query, State};
@@ -28,17 +28,43 @@ pub struct ChallengeServerState<C: ServerChallenge> {
     pub started_at: Instant,
     pub pending_count: Arc<RwLock<u32>>,
     pub challenge_id: ChallengeId,
+    /// Route table declared by the challenge, built once rather than on
+    /// every request that falls through to the custom route handler.
+    pub custom_routes: Vec<ChallengeRoute>,
+    route_db: OnceLock<Arc<ChallengeDatabase>>,
 }
 
 impl<C: ServerChallenge + 'static> ChallengeServerState<C> {
     /// Create a new server state from a challenge, config, and UUID-based challenge ID.
     pub fn new(challenge: C, config: ServerConfig, challenge_id: ChallengeId) -> Self {
+        let custom_routes = challenge.routes();
         Self {
             challenge: Arc::new(challenge),
             config,
             started_at: Instant::now(),
             pending_count: Arc::new(RwLock::new(0)),
             challenge_id,
+            custom_routes,
+            route_db: OnceLock::new(),
+        }
+    }
+
+    /// Database handed to custom route handlers. Opened on first use and
+    /// shared by every later request rather than reopened per request; a
+    /// failed open is retried next time, with a throwaway database serving
+    /// the current request as before.
+    fn route_db(&self) -> Result<Arc<ChallengeDatabase>, String> {
+        if let Some(db) = self.route_db.get() {
+            return Ok(Arc::clone(db));
+        }
+        match ChallengeDatabase::open(
+            std::env::temp_dir(),
+            ChallengeId::from_uuid(self.challenge_id.0),
+        ) {
+            Ok(db) => Ok(Arc::clone(self.route_db.get_or_init(|| Arc::new(db)))),
+            Err(_) => ChallengeDatabase::open(std::env::temp_dir(), ChallengeId::new())
+                .map(Arc::new)
+                .map_err(|e| format!("Failed to open challenge database: {}", e)),
         }
     }
 
@@ -53,14 +79,14 @@ impl<C: ServerChallenge + 'static> ChallengeServerState<C> {
     pub fn router(self) -> Router {
         let state = Arc::new(self);
 
-        let custom_routes = state.challenge.routes();
+        let custom_routes = &state.custom_routes;
         if !custom_routes.is_empty() {
             info!(
                 "Challenge {} declares {} custom route(s)",
                 state.challenge.challenge_id(),
                 custom_routes.len()
             );
-            for route in &custom_routes {
+            for route in custom_routes {
                 debug!(
                     "  {} {} (auth={}, rate_limit={}): {}",
                     route.method.as_str(),
@@ -219,11 +245,9 @@ async fn custom_route_handler<C: ServerChallenge + 'static>(
     let path = uri.path().to_string();
     let method_str = method.as_str().to_string();
 
-    let custom_routes = state.challenge.routes();
-
     let mut matched_params = HashMap::new();
     let mut matched_route: Option<&ChallengeRoute> = None;
-    for route in &custom_routes {
+    for route in &state.custom_routes {
         if let Some(params) = route.matches(&method_str, &path) {
             matched_params = params;
             matched_route = Some(route);
@@ -272,17 +296,16 @@ async fn custom_route_handler<C: ServerChallenge + 'static>(
         auth_hotkey,
     };
 
+    let db = match state.route_db() {
+        Ok(db) => db,
+        Err(e) => {
+            error!("{}", e);
+            return route_response_to_axum(RouteResponse::internal_error(&e));
+        }
+    };
+
     let ctx = ChallengeContext {
-        db: Arc::new(
-            ChallengeDatabase::open(
-                std::env::temp_dir(),
-                ChallengeId::from_uuid(state.challenge_id.0),
-            )
-            .unwrap_or_else(|_| {
-                ChallengeDatabase::open(std::env::temp_dir(), ChallengeId::new())
-                    .expect("Failed to open temporary challenge database")
-            }),
-        ),
+        db,
         challenge_id: state.challenge.challenge_id().to_string(),
         epoch: 0,
         block_height: 0,
@@ -1,8 +1,11 @@
-use std::path::{Path, PathBuf};
+use std::path::{Component, Path, PathBuf};
+use std::sync::OnceLock;
 use std::time::Duration;
 
 use anyhow::{anyhow, Context};
+use futures::stream::{self, StreamExt, TryStreamExt};
 use serde::Deserialize;
+use tokio::io::AsyncWriteExt;
 
 use super::types::DatasetEntry;
 
@@ -10,6 +13,7 @@ const HF_API_BASE: &str = "https://huggingface.co/api/datasets";
 const HF_RESOLVE_BASE: &str = "https://huggingface.co/datasets";
 const ROWS_API_BASE: &str = "https://datasets-server.huggingface.co/rows";
 const REQUEST_TIMEOUT: Duration = Duration::from_secs(30);
+const MAX_CONCURRENT_DOWNLOADS: usize = 8;
 
 #[derive(Debug, Deserialize)]
 struct HuggingFaceTreeEntry {
@@ -28,64 +32,78 @@ struct RowWrapper {
     row: DatasetEntry,
 }
 
+/// Process-wide HTTP client shared by every dataset handle.
+///
+/// Building a client loads the TLS root store; sharing one also lets
+/// datasets from the same host reuse pooled keep-alive connections.
+/// `reqwest::Client` is reference-counted, so handles clone it cheaply.
+fn http_client() -> &'static reqwest::Client {
+    static CLIENT: OnceLock<reqwest::Client> = OnceLock::new();
+    CLIENT.get_or_init(|| {
+        reqwest::Client::builder()
+            .timeout(REQUEST_TIMEOUT)
+            .build()
+            .unwrap_or_default()
+    })
+}
+
 pub struct HuggingFaceDataset {
     repo_id: String,
     cache_dir: PathBuf,
+    /// `{HF_RESOLVE_BASE}/{repo_id}/resolve/main/`, built once so each
+    /// download only appends the file name.
+    resolve_prefix: String,
     client: reqwest::Client,
 }
 
 impl HuggingFaceDataset {
     pub fn new(repo_id: &str, cache_dir: PathBuf) -> Self {
-        let client = reqwest::Client::builder()
-            .timeout(REQUEST_TIMEOUT)
-            .build()
-            .unwrap_or_default();
+        let client = http_client().clone();
 
         Self {
             repo_id: repo_id.to_string(),
             cache_dir,
+            resolve_prefix: format!("{}/{}/resolve/main/", HF_RESOLVE_BASE, repo_id),
             client,
         }
     }
 
     pub async fn list_files(&self) -> anyhow::Result<Vec<String>> {
         let mut files = Vec::new();
-        let mut dirs_to_visit = vec![String::new()];
-
-        while let Some(dir) = dirs_to_visit.pop() {
-            let url = if dir.is_empty() {
-                format!("{}/{}/tree/main", HF_API_BASE, self.repo_id)
-            } else {
-                format!("{}/{}/tree/main/{}", HF_API_BASE, self.repo_id, dir)
-            };
+        let mut next_url = Some(format!(
+            "{}/{}/tree/main?recursive=true",
+            HF_API_BASE, self.repo_id
+        ));
 
+        while let Some(url) = next_url.take() {
             let response = self
                 .client
                 .get(&url)
                 .send()
                 .await
-                .with_context(|| format!("failed to list files at '{dir}'"))?;
+                .with_context(|| format!("failed to list files at '{url}'"))?;
 
             if !response.status().is_success() {
                 return Err(anyhow!(
-                    "HuggingFace API returned {} for path '{}'",
+                    "HuggingFace API returned {} for '{}'",
                     response.status(),
-                    dir
+                    url
                 ));
             }
 
+            next_url = next_page_url(response.headers());
+
             let entries: Vec<HuggingFaceTreeEntry> = response
                 .json()
                 .await
-                .with_context(|| format!("failed to parse tree response for '{dir}'"))?;
-
-            for entry in entries {
-                match entry.entry_type.as_str() {
-                    "file" => files.push(entry.path),
-                    "directory" => dirs_to_visit.push(entry.path),
-                    _ => {}
-                }
-            }
+                .with_context(|| format!("failed to parse tree response for '{url}'"))?;
+
+            files.extend(
+                entries
+                    .into_iter()
+                    .filter(|entry| entry.entry_type == "file" && !is_hidden_path(&entry.path))
+                    .map(|entry| entry.path),
+            );
         }
 
         files.sort();
@@ -93,11 +111,21 @@ impl HuggingFaceDataset {
     }
 
     pub async fn download_file(&self, filename: &str) -> anyhow::Result<PathBuf> {
+        if !is_relative_to_cache(filename) {
+            return Err(anyhow!(
+                "refusing to download '{}' outside the cache directory",
+                filename
+            ));
+        }
         let dest = self.cache_dir.join(filename);
 
-        if dest.exists() {
-            tracing::debug!(path = %dest.display(), "using cached file");
-            return Ok(dest);
+        // One async stat answers both "is it cached" and "is it a real file";
+        // Path::exists would block the runtime thread on the same syscall.
+        if let Ok(metadata) = tokio::fs::metadata(&dest).await {
+            if metadata.is_file() {
+                tracing::debug!(path = %dest.display(), "using cached file");
+                return Ok(dest);
+            }
         }
 
         if let Some(parent) = dest.parent() {
@@ -106,14 +134,11 @@ impl HuggingFaceDataset {
             })?;
         }
 
-        let url = format!(
-            "{}/{}/resolve/main/{}",
-            HF_RESOLVE_BASE, self.repo_id, filename
-        );
+        let url = format!("{}{}", self.resolve_prefix, filename);
 
         tracing::debug!(url = %url, dest = %dest.display(), "downloading file");
 
-        let response = self
+        let mut response = self
             .client
             .get(&url)
             .send()
@@ -128,15 +153,31 @@ impl HuggingFaceDataset {
             ));
         }
 
-        let bytes = response
-            .bytes()
+        // Suffix the full file name rather than replacing the extension:
+        // `data.json` and `data.jsonl` download concurrently and must not
+        // share a temp file.
+        let mut tmp_name = dest.as_os_str().to_owned();
+        tmp_name.push(".tmp");
+        let tmp_path = PathBuf::from(tmp_name);
+        let mut file = tokio::fs::File::create(&tmp_path)
             .await
-            .with_context(|| format!("failed to read response body for '{filename}'"))?;
+            .with_context(|| format!("failed to create '{}'", tmp_path.display()))?;
 
-        let tmp_path = dest.with_extension("tmp");
-        tokio::fs::write(&tmp_path, &bytes)
+        let mut size_bytes = 0usize;
+        while let Some(chunk) = response
+            .chunk()
+            .await
+            .with_context(|| format!("failed to read response body for '{filename}'"))?
+        {
+            file.write_all(&chunk)
+                .await
+                .with_context(|| format!("failed to write '{}'", tmp_path.display()))?;
+            size_bytes += chunk.len();
+        }
+        file.flush()
             .await
             .with_context(|| format!("failed to write '{}'", tmp_path.display()))?;
+        drop(file);
 
         tokio::fs::rename(&tmp_path, &dest)
             .await
@@ -144,7 +185,7 @@ impl HuggingFaceDataset {
 
         tracing::debug!(
             path = %dest.display(),
-            size_bytes = bytes.len(),
+            size_bytes,
             "file downloaded"
         );
 
@@ -168,20 +209,24 @@ impl HuggingFaceDataset {
             .collect();
 
         if json_files.is_empty() {
-            for file in &files {
-                self.download_file(file).await?;
-            }
+            stream::iter(&files)
+                .map(|file| self.download_file(file))
+                .buffer_unordered(MAX_CONCURRENT_DOWNLOADS)
+                .try_collect::<Vec<_>>()
+                .await?;
             return Ok(Vec::new());
         }
 
-        let mut all_entries = Vec::new();
-        for file in json_files {
-            let path = self.download_file(file).await?;
-            let mut parsed = load_json_entries(&path).await?;
-            all_entries.append(&mut parsed);
-        }
+        let parsed: Vec<Vec<DatasetEntry>> = stream::iter(json_files)
+            .map(|file| async move {
+                let path = self.download_file(file).await?;
+                load_json_entries(&path).await
+            })
+            .buffered(MAX_CONCURRENT_DOWNLOADS)
+            .try_collect()
+            .await?;
 
-        Ok(all_entries)
+        Ok(parsed.into_iter().flatten().collect())
     }
 
     async fn fetch_rows(&self, config: &str, split: &str) -> anyhow::Result<Vec<DatasetEntry>> {
@@ -210,6 +255,33 @@ impl HuggingFaceDataset {
     }
 }
 
+/// Extract the `rel="next"` target from a paginated response's `Link` header.
+fn next_page_url(headers: &reqwest::header::HeaderMap) -> Option<String> {
+    let link = headers.get(reqwest::header::LINK)?.to_str().ok()?;
+    link.split(',').find_map(|part| {
+        let (target, params) = part.split_once(';')?;
+        if !params.contains("rel=\"next\"") {
+            return None;
+        }
+        let target = target.trim().strip_prefix('<')?.strip_suffix('>')?;
+        Some(target.to_string())
+    })
+}
+
+/// Whether `path` stays inside the directory it is joined onto. Checked per
+/// component: an absolute path would replace the cache root in `join`, and
+/// `..` could climb out of it.
+fn is_relative_to_cache(path: &str) -> bool {
+    let mut components = Path::new(path).components().peekable();
+    components.peek().is_some() && components.all(|c| matches!(c, Component::Normal(_)))
+}
+
+/// Dot-prefixed entries (`.gitattributes`, `.cache/...`) are repository
+/// metadata, never dataset content.
+fn is_hidden_path(path: &str) -> bool {
+    path.split('/').any(|component| component.starts_with('.'))
+}
+
 async fn load_json_entries(path: &Path) -> anyhow::Result<Vec<DatasetEntry>> {
     let content = tokio::fs::read_to_string(path)
         .await
@@ -239,3 +311,27 @@ async fn load_json_entries(path: &Path) -> anyhow::Result<Vec<DatasetEntry>> {
 
     Ok(entries)
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_is_relative_to_cache_accepts_nested_paths() {
+        assert!(is_relative_to_cache("tasks.json"));
+        assert!(is_relative_to_cache("data/train/tasks.jsonl"));
+    }
+
+    #[test]
+    fn test_is_relative_to_cache_rejects_escaping_paths() {
+        assert!(!is_relative_to_cache("../x"));
+        assert!(!is_relative_to_cache("a/../../b"));
+        assert!(!is_relative_to_cache("/abs"));
+        assert!(!is_relative_to_cache(""));
+    }
+
+    #[test]
+    fn test_is_relative_to_cache_rejects_current_dir_prefix() {
+        assert!(!is_relative_to_cache("./a"));
+    }
+}
@@ -79,7 +79,6 @@ pub fn handle_leaderboard(_request: &WasmRouteRequest) -> WasmRouteResponse {
 
 pub fn handle_stats(_request: &WasmRouteRequest) -> WasmRouteResponse {
     let total_submissions = host_consensus_get_submission_count() as u64;
-    let epoch = host_consensus_get_epoch();
     let active_miners = host_storage_get(b"active_miner_count")
         .ok()
         .and_then(|d| {
@@ -110,7 +109,6 @@ pub fn handle_stats(_request: &WasmRouteRequest) -> WasmRouteResponse {
         active_miners,
         validator_count,
     };
-    let _ = epoch;
     ok_response(bincode::serialize(&stats).unwrap_or_default())
 }
 
@@ -290,7 +288,7 @@ pub fn handle_review_aggregate(request: &WasmRouteRequest) -> WasmRouteResponse
     if let Ok(results) = bincode_options_route_body()
         .deserialize::<Vec<crate::types::LlmReviewResult>>(&request.body)
     {
-        let aggregated = llm_review::aggregate_reviews(&results);
+        let aggregated = llm_review::aggregate_reviews(results);
         ok_response(bincode::serialize(&aggregated).unwrap_or_default())
     } else {
         empty_response()
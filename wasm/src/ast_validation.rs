@@ -1,3 +1,4 @@
+use alloc::collections::BTreeSet;
 use alloc::string::String;
 use alloc::vec::Vec;
 use platform_challenge_sdk_wasm::host_functions::{host_storage_get, host_storage_set};
@@ -28,21 +29,41 @@ pub fn validate_python_code(code: &str, config: &WhitelistConfig) -> AstReviewRe
     let mut violations = Vec::new();
 
     if code.len() > config.max_code_size {
+        // Oversized code is rejected whatever else it contains, so do not
+        // spend a full scan on it.
         violations.push(String::from("Code exceeds maximum allowed size"));
+        return AstReviewResult {
+            passed: false,
+            violations,
+            reviewer_validators: Vec::new(),
+        };
     }
 
-    for builtin in &config.forbidden_builtins {
-        let mut pattern = String::from(builtin.as_str());
-        pattern.push('(');
-        if code.contains(pattern.as_str()) {
-            let mut msg = String::from("Forbidden builtin: ");
-            msg.push_str(builtin);
-            violations.push(msg);
+    let allowed: BTreeSet<&str> = config
+        .allowed_stdlib
+        .iter()
+        .chain(&config.allowed_third_party)
+        .map(String::as_str)
+        .collect();
+
+    // One pass over the lines feeds both checks; import findings are held
+    // back so the report keeps listing them after the call findings.
+    let mut called = alloc::vec![false; config.forbidden_builtins.len() + DANGEROUS_PATTERNS.len()];
+    let mut import_violations = Vec::new();
+    for line in code.lines() {
+        mark_calls(line, &config.forbidden_builtins, &mut called);
+        check_import_line(line, &allowed, &mut import_violations);
+    }
+    let (builtin_calls, dangerous_calls) = called.split_at(config.forbidden_builtins.len());
+
+    for (called, builtin) in builtin_calls.iter().zip(&config.forbidden_builtins) {
+        if *called {
+            violations.push(["Forbidden builtin: ", builtin.as_str()].concat());
         }
     }
 
-    check_dangerous_patterns(code, &mut violations);
-    check_imports(code, config, &mut violations);
+    check_dangerous_patterns(dangerous_calls, &mut violations);
+    violations.append(&mut import_violations);
 
     AstReviewResult {
         passed: violations.is_empty(),
@@ -51,69 +72,72 @@ pub fn validate_python_code(code: &str, config: &WhitelistConfig) -> AstReviewRe
     }
 }
 
-fn check_dangerous_patterns(code: &str, violations: &mut Vec<String>) {
-    let dangerous = [
-        ("os.system(", "Direct OS command execution"),
-        ("os.popen(", "OS pipe execution"),
-        ("subprocess.call(", "Subprocess execution"),
-        ("subprocess.Popen(", "Subprocess execution"),
-        ("subprocess.run(", "Subprocess execution"),
-        ("socket.socket(", "Raw socket access"),
-        ("__import__(", "Dynamic import"),
-    ];
-
-    for (pattern, desc) in &dangerous {
-        if code.contains(pattern) {
-            let mut msg = String::from("Dangerous pattern: ");
-            msg.push_str(desc);
-            msg.push_str(" (");
-            msg.push_str(pattern);
-            msg.push(')');
-            violations.push(msg);
+/// Callees whose call sites are flagged, with the reason reported.
+const DANGEROUS_PATTERNS: &[(&str, &str)] = &[
+    ("os.system", "Direct OS command execution"),
+    ("os.popen", "OS pipe execution"),
+    ("subprocess.call", "Subprocess execution"),
+    ("subprocess.Popen", "Subprocess execution"),
+    ("subprocess.run", "Subprocess execution"),
+    ("socket.socket", "Raw socket access"),
+    ("__import__", "Dynamic import"),
+];
+
+/// Flag which forbidden builtins, then which `DANGEROUS_PATTERNS`, appear
+/// called as `name(` in `line`. Every needle ends at a call paren, so one
+/// pass over the `(` positions checks them all instead of searching once per
+/// needle. Callee names never span lines, so scanning line by line finds the
+/// same calls as scanning the whole code.
+fn mark_calls(line: &str, builtins: &[String], called: &mut [bool]) {
+    for (paren, _) in line.match_indices('(') {
+        let before = &line[..paren];
+        let callees = builtins
+            .iter()
+            .map(String::as_str)
+            .chain(DANGEROUS_PATTERNS.iter().map(|(callee, _)| *callee));
+        for (hit, callee) in called.iter_mut().zip(callees) {
+            if !*hit && before.ends_with(callee) {
+                *hit = true;
+            }
         }
     }
 }
 
-fn check_imports(code: &str, config: &WhitelistConfig, violations: &mut Vec<String>) {
-    for line in code.lines() {
-        let trimmed = line.trim();
+fn check_dangerous_patterns(called: &[bool], violations: &mut Vec<String>) {
+    for (called, (callee, desc)) in called.iter().zip(DANGEROUS_PATTERNS) {
+        if *called {
+            violations.push(["Dangerous pattern: ", *desc, " (", *callee, "()"].concat());
+        }
+    }
+}
 
-        if let Some(rest) = trimmed.strip_prefix("import ") {
-            let modules_part = if let Some(idx) = rest.find(" as ") {
-                &rest[..idx]
-            } else {
-                rest
-            };
-            for module in modules_part.split(',') {
-                let module = module.trim();
-                let root = module.split('.').next().unwrap_or(module).trim();
-                if !root.is_empty() && !is_module_allowed(root, config) {
-                    let mut msg = String::from("Disallowed module: ");
-                    msg.push_str(root);
-                    violations.push(msg);
-                }
+fn check_import_line(line: &str, allowed: &BTreeSet<&str>, violations: &mut Vec<String>) {
+    let trimmed = line.trim();
+    let trimmed = trimmed.split('#').next().unwrap_or("");
+
+    if let Some(rest) = trimmed.strip_prefix("import ") {
+        // Strip the alias from each name on its own: cutting the line at
+        // the first " as " would hide every module listed after it.
+        for name in rest.split(',') {
+            let module = name.split_whitespace().next().unwrap_or("");
+            let root = module.split('.').next().unwrap_or(module);
+            if !root.is_empty() && !allowed.contains(root) {
+                violations.push(["Disallowed module: ", root].concat());
             }
         }
+    }
 
-        if let Some(rest) = trimmed.strip_prefix("from ") {
-            if let Some(import_idx) = rest.find(" import ") {
-                let module = rest[..import_idx].trim();
-                let root = module.split('.').next().unwrap_or(module).trim();
-                if !root.is_empty() && !is_module_allowed(root, config) {
-                    let mut msg = String::from("Disallowed module: ");
-                    msg.push_str(root);
-                    violations.push(msg);
-                }
+    if let Some(rest) = trimmed.strip_prefix("from ") {
+        if let Some(import_idx) = rest.find(" import ") {
+            let module = rest[..import_idx].trim();
+            let root = module.split('.').next().unwrap_or(module).trim();
+            if !root.is_empty() && !allowed.contains(root) {
+                violations.push(["Disallowed module: ", root].concat());
             }
         }
     }
 }
 
-fn is_module_allowed(module: &str, config: &WhitelistConfig) -> bool {
-    config.allowed_stdlib.iter().any(|s| s == module)
-        || config.allowed_third_party.iter().any(|s| s == module)
-}
-
 pub fn store_ast_result(submission_id: &str, result: &AstReviewResult) -> bool {
     let mut key = Vec::from(b"ast_review:" as &[u8]);
     key.extend_from_slice(submission_id.as_bytes());
@@ -132,3 +156,52 @@ pub fn get_ast_result(submission_id: &str) -> Option<AstReviewResult> {
     }
     bincode::deserialize(&data).ok()
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use alloc::vec;
+
+    fn check(line: &str) -> Vec<String> {
+        let config = WhitelistConfig {
+            allowed_stdlib: vec![String::from("os"), String::from("json")],
+            allowed_third_party: Vec::new(),
+            forbidden_builtins: Vec::new(),
+            max_code_size: usize::MAX,
+        };
+        validate_python_code(line, &config).violations
+    }
+
+    #[test]
+    fn test_imports_every_module_on_the_line() {
+        assert_eq!(
+            check("import os, socket as s"),
+            vec![String::from("Disallowed module: socket")]
+        );
+        assert_eq!(
+            check("import socket as s, ctypes"),
+            vec![
+                String::from("Disallowed module: socket"),
+                String::from("Disallowed module: ctypes"),
+            ]
+        );
+        assert!(check("import os.path as p, json").is_empty());
+    }
+
+    #[test]
+    fn test_imports_ignores_trailing_comment() {
+        assert!(check("from os import path  # comment").is_empty());
+        assert_eq!(
+            check("from socket import socket  # os"),
+            vec![String::from("Disallowed module: socket")]
+        );
+        assert!(check("import json  # , socket").is_empty());
+    }
+
+    #[test]
+    fn test_imports_skips_relative_and_non_imports() {
+        assert!(check("from . import sibling").is_empty());
+        assert!(check("# import socket").is_empty());
+        assert!(check("x = 1").is_empty());
+    }
+}
@@ -41,6 +41,23 @@ const MAX_PARAMS_SIZE: u64 = 4 * 1024 * 1024;
 const MAX_ROUTE_REQUEST_SIZE: u64 = 1024 * 1024;
 const MAX_TASKS: usize = 50;
 const EPOCH_RATE_LIMIT: u64 = 3;
+/// Token budget for a single LLM judge prompt, estimated at ~4 bytes per
+/// token. 10% is held back for the fixed instructions, and the rest is split
+/// evenly between the agent output and the expected output.
+const LLM_JUDGE_TOKEN_BUDGET: usize = 8_192;
+const LLM_JUDGE_OUTPUT_BYTES: usize = LLM_JUDGE_TOKEN_BUDGET * 4 * 9 / 10 / 2;
+/// Judge instructions shared by every task. Sent as the system message so
+/// the prompt starts with an identical prefix that providers can cache;
+/// only the per-task user message varies.
+const LLM_JUDGE_SYSTEM_PROMPT: &str =
+    "You are an expert evaluator for a terminal-based AI agent challenge.\n\n\
+     Score the agent's output from 0.0 to 1.0 based on correctness and completeness.\n\
+     Respond with ONLY a JSON object: {\"score\": <float>, \"reasoning\": \"...\"}";
+/// Fixed labels of the per-task judge prompt, appended around the variable
+/// fields rather than re-parsed from a format string on every task.
+const LLM_JUDGE_TASK_LABEL: &str = "Task: ";
+const LLM_JUDGE_AGENT_OUTPUT_LABEL: &str = "\n\nAgent output:\n";
+const LLM_JUDGE_EXPECTED_OUTPUT_LABEL: &str = "\n\nExpected output:\n";
 
 fn bincode_options_submission() -> impl Options {
     bincode::DefaultOptions::new()
@@ -109,19 +126,22 @@ fn store_submission_record(hotkey: &str, epoch: u64, agent_hash: &str) {
     let _ = host_storage_set(&key, agent_hash.as_bytes());
 }
 
-fn parse_judge_score(content: &str) -> Option<f64> {
-    let json_start = content.find('{')?;
-    let json_end = content.rfind('}')? + 1;
-    if json_start >= json_end {
-        return None;
+/// Keep the most recent `max_len` bytes of `output`, starting on a UTF-8
+/// character boundary. Terminal output is most informative at its end.
+fn tail_within(output: &str, max_len: usize) -> &str {
+    if output.len() <= max_len {
+        return output;
     }
-    let json_str = &content[json_start..json_end];
+    let mut start = output.len() - max_len;
+    while !output.is_char_boundary(start) {
+        start += 1;
+    }
+    &output[start..]
+}
 
-    let score_key = "\"score\"";
-    let score_pos = json_str.find(score_key)? + score_key.len();
-    let rest = &json_str[score_pos..];
-    let colon_pos = rest.find(':')?;
-    let after_colon = rest[colon_pos + 1..].trim_start();
+fn parse_judge_score(content: &str) -> Option<f64> {
+    let json_str = llm_review::extract_json_object(content, "score")?;
+    let after_colon = llm_review::json_field(json_str, "score")?;
 
     let end = after_colon
         .find(|c: char| !c.is_ascii_digit() && c != '.' && c != '-')
@@ -164,31 +184,38 @@ impl TermChallengeWasm {
         Self
     }
 
+    /// Ask the LLM judge to score one task. The caller checks host LLM
+    /// availability once for the whole evaluation, not per task.
     fn try_llm_judge(result: &TaskResult, instruction: &str) -> Option<f64> {
-        if !host_llm_is_available() {
-            return None;
-        }
-
-        let mut prompt = String::new();
-        let _ = core::fmt::Write::write_fmt(
-            &mut prompt,
-            format_args!(
-                "You are an expert evaluator for a terminal-based AI agent challenge.\n\n\
-                 Task: {}\n\n\
-                 Agent output:\n{}\n\n\
-                 Expected output:\n{}\n\n\
-                 Score the agent's output from 0.0 to 1.0 based on correctness and completeness.\n\
-                 Respond with ONLY a JSON object: {{\"score\": <float>, \"reasoning\": \"...\"}}",
-                instruction, result.agent_output, result.test_output
-            ),
+        let agent_output = tail_within(&result.agent_output, LLM_JUDGE_OUTPUT_BYTES);
+        let test_output = tail_within(&result.test_output, LLM_JUDGE_OUTPUT_BYTES);
+        let mut prompt = String::with_capacity(
+            LLM_JUDGE_TASK_LABEL.len()
+                + instruction.len()
+                + LLM_JUDGE_AGENT_OUTPUT_LABEL.len()
+                + agent_output.len()
+                + LLM_JUDGE_EXPECTED_OUTPUT_LABEL.len()
+                + test_output.len(),
         );
+        prompt.push_str(LLM_JUDGE_TASK_LABEL);
+        prompt.push_str(instruction);
+        prompt.push_str(LLM_JUDGE_AGENT_OUTPUT_LABEL);
+        prompt.push_str(agent_output);
+        prompt.push_str(LLM_JUDGE_EXPECTED_OUTPUT_LABEL);
+        prompt.push_str(test_output);
 
         let request = LlmRequest {
             model: String::from("moonshotai/Kimi-K2.5-TEE"),
-            messages: alloc::vec![LlmMessage {
-                role: String::from("user"),
-                content: prompt,
-            }],
+            messages: alloc::vec![
+                LlmMessage {
+                    role: String::from("system"),
+                    content: String::from(LLM_JUDGE_SYSTEM_PROMPT),
+                },
+                LlmMessage {
+                    role: String::from("user"),
+                    content: prompt,
+                },
+            ],
             max_tokens: 1024,
             temperature: 0.1,
         };
@@ -1,6 +1,5 @@
 use alloc::string::String;
 use alloc::vec::Vec;
-use core::fmt::Write as _;
 use platform_challenge_sdk_wasm::host_functions::{
     host_llm_chat_completion, host_llm_is_available, host_random_seed, host_storage_get,
     host_storage_set,
@@ -70,14 +69,17 @@ pub fn run_llm_review(agent_code: &str) -> Option<LlmReviewResult> {
         return None;
     }
 
-    let redacted_code = redact_api_keys(agent_code);
-
-    let mut prompt = String::new();
-    let _ = write!(
-        prompt,
-        "Review the following Python agent code:\n\n```python\n{}\n```\n\nProvide your verdict as JSON: {{\"approved\": true/false, \"reason\": \"...\", \"violations\": []}}",
-        redacted_code
+    const PROMPT_HEAD: &str = "Review the following Python agent code:\n\n```python\n";
+    const PROMPT_TAIL: &str = "\n```\n\nProvide your verdict as JSON: {\"approved\": true/false, \"reason\": \"...\", \"violations\": []}";
+    let mut prompt = String::with_capacity(
+        PROMPT_HEAD.len()
+            + agent_code.len().min(MAX_LLM_CODE_SIZE)
+            + TRUNCATED_NOTE.len()
+            + PROMPT_TAIL.len(),
     );
+    prompt.push_str(PROMPT_HEAD);
+    push_redacted_code(&mut prompt, agent_code);
+    prompt.push_str(PROMPT_TAIL);
 
     let request = LlmRequest {
         model: String::from(DEFAULT_LLM_MODEL),
@@ -103,17 +105,13 @@ pub fn run_llm_review(agent_code: &str) -> Option<LlmReviewResult> {
 }
 
 fn parse_llm_verdict(content: &str) -> Option<LlmReviewResult> {
-    let json_start = content.find('{')?;
-    let json_end = content.rfind('}')? + 1;
-    if json_start >= json_end {
-        return None;
-    }
-    let json_str = &content[json_start..json_end];
-
-    let approved =
-        json_str.contains("\"approved\": true") || json_str.contains("\"approved\":true");
+    let json_str = extract_json_object(content, "approved")?;
 
-    let reason = extract_json_string(json_str, "reason").unwrap_or_default();
+    let approved = json_field(json_str, "approved").is_some_and(|v| v.starts_with("true"));
+    let reason = json_field(json_str, "reason")
+        .and_then(json_string_value)
+        .map(String::from)
+        .unwrap_or_default();
 
     Some(LlmReviewResult {
         approved,
@@ -124,22 +122,129 @@ fn parse_llm_verdict(content: &str) -> Option<LlmReviewResult> {
     })
 }
 
-fn extract_json_string(json: &str, key: &str) -> Option<String> {
-    let mut search = String::from("\"");
-    search.push_str(key);
-    search.push_str("\": \"");
-    let start = json.find(search.as_str())? + search.len();
-    let rest = &json[start..];
-    let end = rest.find('"')?;
-    Some(String::from(&rest[..end]))
+/// Slice the first balanced `{...}` object carrying `key` out of an LLM
+/// reply, ignoring any code fence or prose around it and braces inside string
+/// literals. Objects without the key (`{x}` placeholders, examples in the
+/// reasoning) are skipped. A reply cut off before the object closes yields
+/// everything from the opening brace, so fields that did arrive can still be
+/// read.
+pub(crate) fn extract_json_object<'a>(content: &'a str, key: &str) -> Option<&'a str> {
+    let mut start = 0;
+    let mut depth = 0usize;
+    let mut in_string = false;
+    let mut escaped = false;
+    for (i, b) in content.bytes().enumerate() {
+        if in_string {
+            if escaped {
+                escaped = false;
+            } else if b == b'\\' {
+                escaped = true;
+            } else if b == b'"' {
+                in_string = false;
+            }
+            continue;
+        }
+        match b {
+            b'"' if depth > 0 => in_string = true,
+            b'{' => {
+                if depth == 0 {
+                    start = i;
+                }
+                depth += 1;
+            }
+            b'}' if depth > 0 => {
+                depth -= 1;
+                if depth == 0 {
+                    let object = &content[start..=i];
+                    if json_field(object, key).is_some() {
+                        return Some(object);
+                    }
+                }
+            }
+            _ => {}
+        }
+    }
+    let tail = &content[start..];
+    (depth > 0 && json_field(tail, key).is_some()).then_some(tail)
+}
+
+/// Raw text following `"key":` in `json`, leading whitespace skipped. Accepts
+/// both compact and pretty-printed objects.
+pub(crate) fn json_field<'a>(json: &'a str, key: &str) -> Option<&'a str> {
+    let mut rest = json;
+    loop {
+        let pos = rest.find(key)?;
+        let before = &rest[..pos];
+        let after = &rest[pos + key.len()..];
+        if before.ends_with('"') {
+            if let Some(value) = after.strip_prefix('"') {
+                if let Some(value) = value.trim_start().strip_prefix(':') {
+                    return Some(value.trim_start());
+                }
+            }
+        }
+        rest = after;
+    }
+}
+
+/// Contents of the JSON string literal at the start of `value`, up to the
+/// first unescaped closing quote. Escape sequences are left as-is.
+fn json_string_value(value: &str) -> Option<&str> {
+    let body = value.strip_prefix('"')?;
+    let mut escaped = false;
+    for (i, b) in body.bytes().enumerate() {
+        if escaped {
+            escaped = false;
+        } else if b == b'\\' {
+            escaped = true;
+        } else if b == b'"' {
+            return Some(&body[..i]);
+        }
+    }
+    None
 }
 
 const REDACTED_MARKER: &str = "[REDACTED]";
 const MIN_TOKEN_LEN: usize = 12;
 const MIN_QUOTED_SECRET_LEN: usize = 16;
 const SECRET_CONTEXT_WINDOW: usize = 80;
+const TRUNCATED_NOTE: &str = "\n... [truncated]";
+
+const KNOWN_KEY_PREFIXES: &[&[u8]] = &[
+    b"sk-",
+    b"sk_live_",
+    b"sk_test_",
+    b"pk_live_",
+    b"pk_test_",
+    b"AKIA",
+    b"ghp_",
+    b"gho_",
+    b"github_pat_",
+    b"glpat-",
+    b"xoxb-",
+    b"xoxp-",
+    b"xapp-",
+];
+
+/// Bytes that can begin a redaction: the first byte of each known key
+/// prefix, and the quotes that open a quoted secret. Everything else is
+/// skipped with one table lookup instead of trying every prefix.
+const REDACTION_START: [bool; 256] = {
+    let mut table = [false; 256];
+    let mut i = 0;
+    while i < KNOWN_KEY_PREFIXES.len() {
+        table[KNOWN_KEY_PREFIXES[i][0] as usize] = true;
+        i += 1;
+    }
+    table[b'"' as usize] = true;
+    table[b'\'' as usize] = true;
+    table
+};
 
-fn redact_api_keys(code: &str) -> String {
+/// Append `code` to `out` with API keys replaced by `REDACTED_MARKER`,
+/// cut at `MAX_LLM_CODE_SIZE`. Writes straight into the prompt so the
+/// redacted code is never held in a buffer of its own.
+fn push_redacted_code(out: &mut String, code: &str) {
     let src = if code.len() > MAX_LLM_CODE_SIZE {
         let boundary = find_char_boundary(code, MAX_LLM_CODE_SIZE);
         &code[..boundary]
@@ -149,30 +254,33 @@ fn redact_api_keys(code: &str) -> String {
 
     let bytes = src.as_bytes();
     let len = bytes.len();
-    let mut result = String::with_capacity(len);
+    // Text between secrets is copied as whole slices. Matches start and end
+    // on ASCII bytes, so every slice boundary is a char boundary and
+    // non-ASCII source text is copied through intact.
+    let mut copied = 0;
     let mut i = 0;
 
     while i < len {
-        if let Some(end) = try_match_known_prefix(bytes, i) {
-            result.push_str(REDACTED_MARKER);
-            i = end;
+        if !REDACTION_START[bytes[i] as usize] {
+            i += 1;
             continue;
         }
-
-        if let Some(end) = try_match_quoted_secret(bytes, i) {
-            result.push_str(REDACTED_MARKER);
+        let matched =
+            try_match_known_prefix(bytes, i).or_else(|| try_match_quoted_secret(bytes, i));
+        if let Some(end) = matched {
+            out.push_str(&src[copied..i]);
+            out.push_str(REDACTED_MARKER);
             i = end;
+            copied = end;
             continue;
         }
-
-        result.push(bytes[i] as char);
         i += 1;
     }
+    out.push_str(&src[copied..]);
 
     if code.len() > MAX_LLM_CODE_SIZE {
-        result.push_str("\n... [truncated]");
+        out.push_str(TRUNCATED_NOTE);
     }
-    result
 }
 
 fn find_char_boundary(s: &str, max: usize) -> usize {
@@ -187,23 +295,7 @@ fn find_char_boundary(s: &str, max: usize) -> usize {
 }
 
 fn try_match_known_prefix(bytes: &[u8], start: usize) -> Option<usize> {
-    const PREFIXES: &[&[u8]] = &[
-        b"sk-",
-        b"sk_live_",
-        b"sk_test_",
-        b"pk_live_",
-        b"pk_test_",
-        b"AKIA",
-        b"ghp_",
-        b"gho_",
-        b"github_pat_",
-        b"glpat-",
-        b"xoxb-",
-        b"xoxp-",
-        b"xapp-",
-    ];
-
-    for prefix in PREFIXES {
+    for prefix in KNOWN_KEY_PREFIXES {
         let plen = prefix.len();
         if start + plen > bytes.len() {
             continue;
@@ -264,34 +356,31 @@ fn is_preceded_by_secret_keyword(bytes: &[u8], quote_pos: usize) -> bool {
     };
 
     let before = &bytes[line_start..quote_pos];
-    let mut lower_buf = alloc::vec::Vec::with_capacity(before.len());
-    for &b in before {
-        lower_buf.push(b.to_ascii_lowercase());
-    }
-    let lower_str = core::str::from_utf8(&lower_buf).unwrap_or("");
-
-    const SECRET_KEYWORDS: &[&str] = &[
-        "api_key",
-        "apikey",
-        "api-key",
-        "secret",
-        "token",
-        "password",
-        "passwd",
-        "credential",
-        "auth_key",
-        "access_key",
-        "private_key",
-        "openai_api",
-        "anthropic_api",
+
+    const SECRET_KEYWORDS: &[&[u8]] = &[
+        b"api_key",
+        b"apikey",
+        b"api-key",
+        b"secret",
+        b"token",
+        b"password",
+        b"passwd",
+        b"credential",
+        b"auth_key",
+        b"access_key",
+        b"private_key",
+        b"openai_api",
+        b"anthropic_api",
     ];
 
-    for keyword in SECRET_KEYWORDS {
-        if lower_str.contains(keyword) {
-            return true;
-        }
-    }
-    false
+    // Compare case-insensitively in place: no lowercased copy of the window,
+    // and a window that starts mid-character no longer fails UTF-8 decoding
+    // and silently hides the keyword.
+    SECRET_KEYWORDS.iter().any(|keyword| {
+        before
+            .windows(keyword.len())
+            .any(|window| window.eq_ignore_ascii_case(keyword))
+    })
 }
 
 fn scan_token_end(bytes: &[u8], start: usize) -> usize {
@@ -326,24 +415,24 @@ pub fn get_review_result(submission_id: &str) -> Option<LlmReviewResult> {
     bincode::deserialize(&data).ok()
 }
 
-pub fn aggregate_reviews(results: &[LlmReviewResult]) -> LlmReviewResult {
-    let approved_count = results.iter().filter(|r| r.approved).count();
+pub fn aggregate_reviews(results: Vec<LlmReviewResult>) -> LlmReviewResult {
     let total = results.len();
-    let approved = total > 0 && approved_count * 2 > total;
-
+    let mut approved_count = 0usize;
     let mut all_violations = Vec::new();
     let mut all_validators = Vec::new();
     let mut all_scores = Vec::new();
     let mut reason = String::new();
 
     for r in results {
-        all_violations.extend(r.violations.iter().cloned());
-        all_validators.extend(r.reviewer_validators.iter().cloned());
-        all_scores.extend(r.scores.iter().copied());
+        approved_count += usize::from(r.approved);
+        all_violations.extend(r.violations);
+        all_validators.extend(r.reviewer_validators);
+        all_scores.extend(r.scores);
         if !r.reason.is_empty() && reason.is_empty() {
-            reason = r.reason.clone();
+            reason = r.reason;
         }
     }
+    let approved = total > 0 && approved_count * 2 > total;
 
     LlmReviewResult {
         approved,
@@ -353,3 +442,85 @@ pub fn aggregate_reviews(results: &[LlmReviewResult]) -> LlmReviewResult {
         scores: all_scores,
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_extract_json_object_ignores_surrounding_text() {
+        let content = "```json\n{\"approved\": true, \"reason\": \"ok\"}\n```\nThanks!";
+        assert_eq!(
+            extract_json_object(content, "approved"),
+            Some("{\"approved\": true, \"reason\": \"ok\"}")
+        );
+    }
+
+    #[test]
+    fn test_extract_json_object_ignores_braces_in_strings() {
+        let content = r#"Verdict: {"reason": "uses {x} and \"}\"", "approved": false} {}"#;
+        assert_eq!(
+            extract_json_object(content, "approved"),
+            Some(r#"{"reason": "uses {x} and \"}\"", "approved": false}"#)
+        );
+    }
+
+    #[test]
+    fn test_extract_json_object_skips_objects_without_key() {
+        let content = "The agent uses {x} here. {\"approved\": true, \"reason\": \"ok\"}";
+        assert_eq!(
+            extract_json_object(content, "approved"),
+            Some("{\"approved\": true, \"reason\": \"ok\"}")
+        );
+
+        let content = "It formats {name} strings.\n{\"score\": 0.8, \"reasoning\": \"ok\"}";
+        assert_eq!(
+            extract_json_object(content, "score"),
+            Some("{\"score\": 0.8, \"reasoning\": \"ok\"}")
+        );
+    }
+
+    #[test]
+    fn test_extract_json_object_truncated_or_missing() {
+        assert_eq!(
+            extract_json_object("{\"approved\": false, \"reason\": \"cut", "approved"),
+            Some("{\"approved\": false, \"reason\": \"cut")
+        );
+        assert_eq!(extract_json_object("no object", "approved"), None);
+        assert_eq!(extract_json_object("{\"reason\": \"cut", "approved"), None);
+    }
+
+    #[test]
+    fn test_json_field_compact_and_pretty() {
+        assert_eq!(
+            json_field("{\"approved\":true,\"score\":0.5}", "score"),
+            Some("0.5}")
+        );
+        assert_eq!(
+            json_field("{\n  \"approved\" :  false\n}", "approved"),
+            Some("false\n}")
+        );
+    }
+
+    #[test]
+    fn test_json_field_matches_whole_key_only() {
+        let json = "{\"approved_by\": \"x\", \"not_approved\": true, \"approved\": false}";
+        assert_eq!(json_field(json, "approved"), Some("false}"));
+        assert_eq!(json_field(json, "missing"), None);
+    }
+
+    #[test]
+    fn test_parse_llm_verdict() {
+        let verdict =
+            parse_llm_verdict("Here: {\"approved\": false, \"reason\": \"hardcoded \\\"key\\\"\"}")
+                .unwrap();
+        assert!(!verdict.approved);
+        assert_eq!(verdict.reason, "hardcoded \\\"key\\\"");
+
+        let verdict =
+            parse_llm_verdict("See {x}. {\"approved\": true, \"reason\": \"ok\"}").unwrap();
+        assert!(verdict.approved);
+        assert!(parse_llm_verdict("{\"reason\": \"no flag\"}").is_none());
+        assert!(parse_llm_verdict("plain text").is_none());
+    }
+}
@@ -93,7 +93,9 @@ pub fn to_weight(score: &AggregateScore) -> f64 {
 
 /// Format a human-readable summary of aggregate scoring results.
 pub fn format_summary(score: &AggregateScore) -> String {
-    let mut msg = String::new();
+    // Room for every field at typical widths, so the writes below do not
+    // regrow the buffer.
+    let mut msg = String::with_capacity(96);
     let _ = write!(
         msg,
         "passed={}/{} rate={:.2}%",
@@ -96,7 +96,8 @@ pub fn get_submission_by_name(name: &str) -> Option<(String, SubmissionVersion)>
     }
     let entry: SubmissionName = bincode::deserialize(&data).ok()?;
 
-    let versions = get_submission_history(&entry.owner_hotkey, name);
-    let latest = versions.last()?.clone();
+    // The history is append-only, so the newest version is the tail: take it
+    // out of the decoded list instead of cloning it.
+    let latest = get_submission_history(&entry.owner_hotkey, name).pop()?;
     Some((entry.owner_hotkey, latest))
 }